@@ -0,0 +1,77 @@
+"""
+Deterministic, API-shaped sample data for the benchmarks: tracks, albums and
+artists as the Spotify Web API returns them, with the fields the server reads
+and the bulky ones it does not (markets, images, external URLs).
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+# The package reads its credentials at import time; the benchmarks never reach Spotify
+for name, value in (("SPOTIFY_CLIENT_ID", "benchmark"), ("SPOTIFY_CLIENT_SECRET", "benchmark"),
+                    ("SPOTIFY_REDIRECT_URI", "http://127.0.0.1:8080/callback")):
+    os.environ.setdefault(name, value)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+MARKETS = ["AD", "AR", "AT", "AU", "BE", "BG", "BO", "BR", "CA", "CH", "CL", "CO", "CR", "CY", "CZ", "DE",
+           "DK", "DO", "EC", "EE", "ES", "FI", "FR", "GB", "GR", "GT", "HK", "HN", "HU", "ID", "IE", "IS",
+           "IT", "JP", "LI", "LT", "LU", "LV", "MC", "MT", "MX", "MY", "NI", "NL", "NO", "NZ", "PA", "PE"]
+# Some names carry non-ASCII characters, as real catalog names do
+NAME_SUFFIXES = ["", "", "", " – Remastered", " (feat. Beyoncé)", " Ñandú", " 夜に駆ける", " 🎸"]
+
+
+def spotify_id(prefix: str, i: int) -> str:
+    return f"{prefix}{i:020d}"[:22]
+
+
+def artist(i: int) -> dict:
+    artist_id = spotify_id("ar", i)
+    return {'id': artist_id, 'name': f"Artist name {i}{NAME_SUFFIXES[i % len(NAME_SUFFIXES)]}",
+            'type': 'artist', 'uri': f"spotify:artist:{artist_id}",
+            'href': f"https://api.spotify.com/v1/artists/{artist_id}",
+            'external_urls': {'spotify': f"https://open.spotify.com/artist/{artist_id}"}}
+
+
+def album(i: int, artists: list) -> dict:
+    album_id = spotify_id("al", i)
+    return {'id': album_id, 'name': f"Album title {i}{NAME_SUFFIXES[i % len(NAME_SUFFIXES)]}",
+            'album_type': 'album', 'total_tracks': 12, 'release_date': f"{1990 + i % 35}-05-01",
+            'release_date_precision': 'day', 'artists': artists, 'available_markets': MARKETS,
+            'images': [{'url': f"https://i.scdn.co/image/{album_id}{size}", 'height': size, 'width': size}
+                       for size in (640, 300, 64)],
+            'type': 'album', 'uri': f"spotify:album:{album_id}",
+            'href': f"https://api.spotify.com/v1/albums/{album_id}",
+            'external_urls': {'spotify': f"https://open.spotify.com/album/{album_id}"}}
+
+
+def track(i: int, track_album: dict, artists: list) -> dict:
+    track_id = spotify_id("tr", i)
+    return {'id': track_id, 'name': f"Track title {i}{NAME_SUFFIXES[i % len(NAME_SUFFIXES)]}",
+            'album': track_album, 'artists': artists, 'track_number': i % 12 + 1, 'disc_number': 1,
+            'duration_ms': 180000 + i, 'explicit': i % 5 == 0, 'popularity': i % 100,
+            'is_local': False, 'available_markets': MARKETS, 'external_ids': {'isrc': f"USRC1{i:07d}"},
+            'type': 'track', 'uri': f"spotify:track:{track_id}",
+            'href': f"https://api.spotify.com/v1/tracks/{track_id}",
+            'external_urls': {'spotify': f"https://open.spotify.com/track/{track_id}"}}
+
+
+def catalog(n_tracks: int, n_albums: int, n_artists: int, seed: int = 0) -> list:
+    """n_tracks full track objects over n_albums albums and n_artists artists; every 4th has a featured artist."""
+    rng = random.Random(seed)
+    artists = [artist(i) for i in range(n_artists)]
+    albums = [album(i, [rng.choice(artists)]) for i in range(n_albums)]
+    tracks = []
+    for i in range(n_tracks):
+        track_album = rng.choice(albums)
+        featured = [rng.choice(artists)] if i % 4 == 0 else []
+        # Each response carries its own copies; nothing is shared between decoded objects
+        tracks.append(track(i, {**track_album, 'artists': [dict(a) for a in track_album['artists']]},
+                            [dict(a) for a in track_album['artists'] + featured]))
+    return tracks
+
+
+def playlist_item(track_object: dict) -> dict:
+    return {'added_at': "2024-01-01T00:00:00Z", 'added_by': {'id': "someone", 'type': 'user'},
+            'is_local': False, 'track': track_object}
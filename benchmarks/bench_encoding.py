@@ -0,0 +1,46 @@
+"""
+Bytes and encode time of each response format, with the standard library
+encoder and with orjson when it is installed. Checks on the way that both
+encoders produce the same text.
+
+    uv run python benchmarks/bench_encoding.py [tracks]
+"""
+
+import json
+import sys
+import time
+
+import _samples
+from spotify_mcp import encoding, utils
+
+ROUNDS = 20
+
+
+def encode_time(obj, fmt: str) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        encoding.encode_response(obj, fmt)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main(n_tracks: int):
+    result = {'tracks': [utils.parse_track(t, detailed=True) for t in _samples.catalog(n_tracks, n_tracks // 4, 200)]}
+    print(f"{n_tracks:,} detailed tracks")
+    orjson = encoding.orjson
+    for fmt in encoding.RESPONSE_FORMATS:
+        encoding.orjson = None
+        text = encoding.encode_response(result, fmt)
+        stdlib_time = encode_time(result, fmt)
+        line = f"  {fmt:8s} {len(text.encode('utf-8')):>10,} B   json {stdlib_time * 1000:7.2f} ms"
+        if orjson is not None:
+            encoding.orjson = orjson
+            assert encoding.encode_response(result, fmt) == text, f"orjson output differs for {fmt}"
+            line += f"   orjson {encode_time(result, fmt) * 1000:7.2f} ms"
+        print(line)
+    encoding.orjson = orjson
+    # The pretty format is the historical output
+    assert encoding.encode_response(result, "pretty") == json.dumps(result, indent=2)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,66 @@
+"""
+Parsed tracks as the caches could hold them: utils.parse_track() dicts versus
+entities.Track, for a large cached library (100k tracks over 15k albums and
+5k artists by default). Reports the memory each form holds, measured with
+tracemalloc, and the time to parse them.
+
+Only what the parsed form adds is counted: the raw API objects are built
+before measuring, and both forms share their strings.
+
+    uv run python benchmarks/bench_entities.py [tracks]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+import _samples
+from spotify_mcp import entities, utils
+
+
+def raw_tracks(n_tracks: int) -> list:
+    """Track objects with just the fields parsing reads; the bulky ones would only slow the setup down."""
+    rng = random.Random(0)
+    artists = [{'id': _samples.spotify_id('ar', i), 'name': f"Artist name {i}"} for i in range(max(n_tracks // 20, 1))]
+    albums = [{'id': _samples.spotify_id('al', i), 'name': f"Album title number {i}", 'artists': [rng.choice(artists)]}
+              for i in range(max(n_tracks * 3 // 20, 1))]
+    tracks = []
+    for i in range(n_tracks):
+        album = rng.choice(albums)
+        featured = [rng.choice(artists)] if i % 4 == 0 else []
+        tracks.append({'id': _samples.spotify_id('tr', i), 'name': f"Track title {i}", 'album': dict(album),
+                       'artists': [dict(a) for a in album['artists'] + featured],
+                       'track_number': i % 12 + 1, 'duration_ms': 180000 + i})
+    return tracks
+
+
+def measure(build) -> tuple:
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, len(kept)
+
+
+def main(n_tracks: int):
+    raw = raw_tracks(n_tracks)
+    print(f"{n_tracks:,} tracks")
+    for label, build in [
+        ("dicts, utils.parse_track()", lambda: [utils.parse_track(t) for t in raw]),
+        ("entities.Track", lambda: [entities.Track.from_api(t) for t in raw]),
+    ]:
+        size, elapsed, count = measure(build)
+        print(f"  {label:28s} {size / 2 ** 20:6.1f} MiB  {size / count:4.0f} B/track  "
+              f"{elapsed / count * 1e6:5.2f} us/track to parse")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,73 @@
+"""
+Decoding a playlist items page at once versus incrementally with
+streaming.decode_page: peak memory (tracemalloc), time, and gen-0 garbage
+collections per page, for a full 100-item page of API-shaped tracks.
+
+Both paths drop the unused fields and narrow each item to what
+get_playlist_tracks returns; the results are checked to be equal.
+
+    uv run python benchmarks/bench_streaming.py [pages]
+"""
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import _samples
+from spotify_mcp import spotify_api, streaming, utils
+
+
+def page_body() -> bytes:
+    tracks = _samples.catalog(100, 40, 30)
+    return json.dumps({'href': "https://api.spotify.com/v1/playlists/p/tracks?offset=0&limit=100",
+                       'items': [_samples.playlist_item(t) for t in tracks], 'limit': 100, 'next': None,
+                       'offset': 0, 'previous': None, 'total': 100}).encode()
+
+
+def chunks(body: bytes):
+    return (body[i:i + streaming.CHUNK_SIZE] for i in range(0, len(body), streaming.CHUNK_SIZE))
+
+
+def narrow(item: dict) -> dict:
+    return utils.parse_track(item['track'])
+
+
+def whole(body: bytes) -> list:
+    page = json.loads(body)
+    spotify_api._drop_fields(page)
+    return [narrow(item) for item in page['items']]
+
+
+def streamed(body: bytes) -> list:
+    return streaming.decode_page(chunks(body), narrow, object_hook=spotify_api._drop_fields_hook)['items']
+
+
+def peak(decode, body: bytes) -> int:
+    gc.collect()
+    tracemalloc.start()
+    decode(body)
+    _, peak_size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_size
+
+
+def main(pages: int):
+    body = page_body()
+    assert whole(body) == streamed(body)
+    print(f"page of 100 items, {len(body) / 1024:.0f} KiB; {pages} pages timed")
+    for decode in (whole, streamed):
+        gc.collect()
+        collections = gc.get_stats()[0]['collections']
+        start = time.perf_counter()
+        for _ in range(pages):
+            decode(body)
+        elapsed = (time.perf_counter() - start) / pages
+        collections = gc.get_stats()[0]['collections'] - collections
+        print(f"  {decode.__name__:9s} peak {peak(decode, body) / 1024:6.0f} KiB  {elapsed * 1000:5.1f} ms/page  "
+              f"{collections / pages:5.2f} gen-0 collections/page")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,83 @@
+"""
+Checks that the entities' to_dict() returns exactly what utils.parse_*
+returns, for tracks, artists, albums and playlists covering featured artists,
+unplayable, now-playing and removed tracks, and projected playlist items.
+Exits non-zero on the first mismatch.
+
+    uv run python benchmarks/check_entity_parity.py
+"""
+
+import json
+import sys
+
+import _samples
+from spotify_mcp import entities, utils
+
+
+def sample_items() -> dict:
+    tracks = _samples.catalog(400, 60, 40, seed=1)
+    for i, track in enumerate(tracks):
+        if i % 7 == 0:
+            track['is_playable'] = False
+        if i % 11 == 0:
+            track['is_playing'] = i % 22 == 0
+    # Playlist item projections (PLAYLIST_FIELDS, PLAYLIST_ITEM_FIELDS['display']) carry partial albums
+    projected = [{'id': t['id'], 'name': t['name'], 'artists': [{'id': a['id'], 'name': a['name']} for a in t['artists']],
+                  'album': {'id': t['album']['id'], 'name': t['album']['name']}} for t in tracks[:40]]
+
+    albums = []
+    for i in range(120):
+        album = dict(tracks[i]['album'])
+        if i % 3 == 0:
+            album['artists'] = album['artists'] + [_samples.artist(1000 + i)]
+        album['tracks'] = {'items': [{k: v for k, v in t.items() if k != 'album'} for t in tracks[i:i + 5]]}
+        albums.append(album)
+
+    artists = [dict(_samples.artist(i), genres=["rock", "indie"][:i % 3]) for i in range(80)]
+
+    playlists = []
+    for i in range(40):
+        items = [{'track': t} for t in tracks[i * 5:i * 5 + 8]] + [{'track': None}]  # a removed track
+        playlists.append({'id': f"pl{i}", 'name': f"Playlist {i}", 'description': None if i % 2 else "Mixed",
+                          'owner': {'id': "someone", 'display_name': "Me" if i % 2 else "Someone else"},
+                          'tracks': {'total': len(items), 'items': items}})
+    return {'tracks': tracks + [None] * 40, 'projected': projected, 'albums': albums, 'artists': artists,
+            'playlists': playlists}
+
+
+def compare(kind: str, item, expected, actual) -> bool:
+    if json.dumps(expected) == json.dumps(actual):
+        return True
+    print(f"Mismatch for {kind} {item and item.get('id')}:\n  parse:  {expected}\n  entity: {actual}")
+    return False
+
+
+def main() -> int:
+    samples = sample_items()
+    checked = 0
+    for track in samples['tracks'] + samples['projected']:
+        for detailed in (False, True):
+            entity = entities.Track.from_api(track).to_dict(detailed) if track else None
+            if not compare('track', track, utils.parse_track(track, detailed), entity):
+                return 1
+        checked += 1
+    for album in samples['albums']:
+        if not compare('album', album, utils.parse_album(album), entities.Album.from_api(album).to_dict()):
+            return 1
+        checked += 1
+    for artist in samples['artists']:
+        if not compare('artist', artist, utils.parse_artist(artist), entities.Artist.from_api(artist).to_dict()):
+            return 1
+        checked += 1
+    for playlist in samples['playlists']:
+        for detailed in (False, True):
+            entity = entities.Playlist.from_api(playlist, with_tracks=detailed).to_dict("Me", detailed)
+            if not compare('playlist', playlist, utils.parse_playlist(playlist, "Me", detailed), entity):
+                return 1
+        checked += 1
+    print(f"{checked} sample items parse identically")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
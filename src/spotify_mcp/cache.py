@@ -0,0 +1,163 @@
+"""
+Caches used by the Spotify client.
+
+TTLCache is an in-memory cache with stale-while-revalidate refresh. Entries
+younger than `ttl` are served as-is. Entries older than `ttl` but still inside
+the `stale_ttl` window are served immediately while a background thread
+reloads them, so a slow Spotify round trip never sits on the request path for
+data that was good enough a moment ago.
+
+PersistentCache is a small JSON-file cache under CACHE_DIR for lookups that
+should survive restarts.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Directory for caches that outlive the server process
+CACHE_DIR = Path(os.getenv("SPOTIFY_MCP_CACHE_DIR", Path.home() / ".cache" / "spotify-mcp"))
+
+
+class TTLCache:
+    def __init__(self, ttl: float, stale_ttl: float = 0, max_entries: int = 512,
+                 on_update: Optional[Callable[[Hashable], None]] = None):
+        """
+        - ttl: seconds an entry is served without refreshing.
+        - stale_ttl: extra seconds an expired entry may still be served while it is refreshed in the background.
+        - max_entries: least recently used entries are evicted beyond this size.
+        - on_update: called with the key whenever an entry is stored with a different value or invalidated.
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.on_update = on_update
+        self._entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], T]) -> T:
+        """Returns the cached value for key, calling loader to fill or refresh it."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                    return value
+
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def peek(self, key: Hashable) -> Optional[object]:
+        """Returns the cached value for key if it is still servable, without loading or refreshing."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl + self.stale_ttl:
+                return None
+            return entry[1]
+
+    def set(self, key: Hashable, value: object):
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.on_update and (previous is None or previous[1] != value):
+            self.on_update(key)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drops one entry, or every entry if key is omitted."""
+        with self._lock:
+            if key is None:
+                dropped = list(self._entries)
+                self._entries.clear()
+            else:
+                dropped = [key] if self._entries.pop(key, None) is not None else []
+        if self.on_update:
+            for dropped_key in dropped:
+                self.on_update(dropped_key)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], object]):
+        try:
+            self.set(key, loader())
+        except Exception as e:
+            logger.error(f"Error refreshing cache entry {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+class PersistentCache:
+    """
+    Small string-keyed cache stored as a JSON file, for lookups that stay valid across restarts.
+    Entries carry their own expiry, so positive and negative results can live for different times.
+    """
+
+    def __init__(self, path: Path, ttl: float):
+        """
+        - path: JSON file backing the cache. Created on first write.
+        - ttl: default lifetime of an entry in seconds.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.time()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return default
+            return entry[1]
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        """Stores value (None is a valid, negative result) and writes the file through."""
+        with self._lock:
+            self._entries[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+            self._save()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                now = time.time()
+                return {k: tuple(v) for k, v in json.load(f).items() if v[0] > now}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable cache file {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error writing cache file {self.path}: {e}")
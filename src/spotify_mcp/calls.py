@@ -0,0 +1,149 @@
+"""
+Per-call context for long-running tool work.
+
+Multi-step tools run their work off the event loop, in a background job or a
+worker thread. They report progress and partial results through the
+CallContext of the call they serve. The context is carried in a context
+variable, so the tools and the Client can reach it without passing it through
+every function.
+
+Cancellation is cooperative: cancel() flags the context and the next check()
+in that call raises Cancelled. The Client checks before every Spotify
+request. A call can also carry a deadline. Past it, check() raises
+DeadlineExceeded, and until then every request's timeout is capped to the
+time that is left.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class Cancelled(BaseException):
+    """
+    Raised inside a call that was cancelled.
+    Like asyncio.CancelledError it is not an Exception, so the tools' per-item error handling does not swallow it.
+    """
+
+
+class DeadlineExceeded(Cancelled):
+    """Raised inside a call whose deadline has passed. Tools catch it to return what they have so far."""
+
+
+_current: contextvars.ContextVar[Optional['CallContext']] = contextvars.ContextVar("spotify_call", default=None)
+
+
+class CallContext:
+    def __init__(self, on_progress: Optional[Callable[['CallContext'], None]] = None,
+                 on_partial: Optional[Callable[['CallContext', str], None]] = None,
+                 timeout: Optional[float] = None):
+        """
+        - on_progress: called after every progress update.
+        - on_partial: called with the key after every partial result.
+        - timeout: seconds from now until the call's deadline, or None for no deadline.
+        """
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.done: float = 0
+        self.total: Optional[int] = None
+        self.message: Optional[str] = None
+        self.partial_results: dict = {}
+        self._on_progress = on_progress
+        self._on_partial = on_partial
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        """Raises Cancelled if the call was cancelled, DeadlineExceeded if its deadline has passed."""
+        if self._cancelled.is_set():
+            raise Cancelled()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def expired(self, reserve: float = 0.0) -> bool:
+        """
+        True once less than the given fraction of the call's time budget is left.
+        Lets a tool stop gathering data early enough to still write its results.
+        """
+        if self.deadline is None:
+            return False
+        return self.remaining() <= self.timeout * reserve
+
+    def progress(self, done: float, total: Optional[int] = None, message: Optional[str] = None):
+        with self._lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+        if self._on_progress:
+            self._on_progress(self)
+
+    def partial(self, key: str, value: Any):
+        """Records output that is already final, e.g. a playlist that has been created."""
+        with self._lock:
+            self.partial_results[key] = value
+        if self._on_partial:
+            self._on_partial(self, key)
+
+
+def current() -> Optional[CallContext]:
+    return _current.get()
+
+
+def run(context: CallContext, func: Callable[..., T], *args, **kwargs) -> T:
+    """Runs func with context as the current call context."""
+    token = _current.set(context)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current.reset(token)
+
+
+def check():
+    """Raises Cancelled if the current call, if any, was cancelled."""
+    context = _current.get()
+    if context is not None:
+        context.check()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current call's deadline, or None without one."""
+    context = _current.get()
+    return context.remaining() if context is not None else None
+
+
+def expired(reserve: float = 0.0) -> bool:
+    """See CallContext.expired. Always False outside a call."""
+    context = _current.get()
+    return context is not None and context.expired(reserve)
+
+
+def progress(done: float, total: Optional[int] = None, message: Optional[str] = None):
+    """Reports progress for the current call, if any."""
+    context = _current.get()
+    if context is not None:
+        context.progress(done, total, message)
+
+
+def partial(key: str, value: Any):
+    """Records a partial result for the current call, if any."""
+    context = _current.get()
+    if context is not None:
+        context.partial(key, value)
@@ -0,0 +1,93 @@
+"""
+Encoding of tool results into the text returned to the MCP host.
+
+Formats:
+- pretty: indented JSON (the historical output).
+- compact: JSON without whitespace.
+- table: compact JSON where homogeneous lists of objects (track lists and the
+  like) are written as {"fields": [...], "rows": [[...], ...]}, so field names
+  are sent once instead of once per item.
+
+orjson is used when installed (`pip install spotify-mcp[fast]`), otherwise the
+standard library encoder. Both give the same text, with non-ASCII characters
+escaped in the pretty format as json.dumps(indent=2) does, except for values
+tool results do not contain: orjson writes NaN and infinities as null and
+leaves out the exponent's leading zero (1e-7 rather than 1e-07).
+
+benchmarks/bench_encoding.py compares the formats and encoders.
+"""
+
+import codecs
+import json
+import os
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+RESPONSE_FORMATS = ("pretty", "compact", "table")
+
+# Server-wide default, overridable per call with the response_format argument
+DEFAULT_RESPONSE_FORMAT = os.getenv("SPOTIFY_RESPONSE_FORMAT", "pretty")
+
+# Lists shorter than this are left as-is by the table format; the header would not pay for itself
+TABLE_MIN_ROWS = 2
+
+
+def check_format(fmt: str):
+    """Raises ValueError unless fmt is one of RESPONSE_FORMATS."""
+    if fmt not in RESPONSE_FORMATS:
+        raise ValueError(f"Unknown response_format {fmt}. Must be one of {', '.join(RESPONSE_FORMATS)}.")
+
+
+def encode_response(obj: Any, fmt: Optional[str] = None) -> str:
+    """
+    Encodes a tool result.
+    - obj: JSON-serializable result.
+    - fmt: one of RESPONSE_FORMATS. Defaults to DEFAULT_RESPONSE_FORMAT.
+    """
+    fmt = fmt or DEFAULT_RESPONSE_FORMAT
+    check_format(fmt)
+    if fmt == "table":
+        obj = tabulate(obj)
+
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if fmt == "pretty" else 0
+        try:
+            text = orjson.dumps(obj, option=option).decode("utf-8")
+            return _escape_non_ascii(text) if fmt == "pretty" else text
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the standard encoder handles everything else
+    if fmt == "pretty":
+        return json.dumps(obj, indent=2)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def tabulate(obj: Any) -> Any:
+    """Recursively rewrites homogeneous lists of dicts as {'fields': [...], 'rows': [[...], ...]}."""
+    if isinstance(obj, dict):
+        return {k: tabulate(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        items = [tabulate(v) for v in obj]
+        if len(items) >= TABLE_MIN_ROWS and all(isinstance(v, dict) for v in items):
+            fields = list(dict.fromkeys(k for item in items for k in item))
+            return {'fields': fields, 'rows': [[item.get(f) for f in fields] for item in items]}
+        return items
+    return obj
+
+
+def _escape_non_ascii(text: str) -> str:
+    """Escapes non-ASCII characters like json.dumps' ensure_ascii. They only occur inside strings."""
+    if text.isascii():
+        return text
+    return text.encode("ascii", "spotify_mcp_json_escape").decode("ascii")
+
+
+def _json_escape(error: UnicodeEncodeError):
+    """Codec error handler writing each run of unencodable characters as JSON escapes."""
+    return json.encoder.encode_basestring_ascii(error.object[error.start:error.end])[1:-1], error.end
+
+
+codecs.register_error("spotify_mcp_json_escape", _json_escape)
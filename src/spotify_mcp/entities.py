@@ -0,0 +1,175 @@
+"""
+Compact parsed entities for data the server keeps in memory.
+
+The library cache keeps playlists and their tracks as __slots__ objects
+instead of dicts. Artists and albums are interned by ID: every track (and
+album) that refers to the same artist or album shares one object, for as
+long as anything still refers to it. Results that are not kept for long are
+parsed straight to dicts by utils.parse_*, without the registry's lock.
+
+to_dict() produces exactly the dict utils.parse_* returns for the same item,
+so tool output does not depend on whether an entity was cached.
+"""
+
+import threading
+import weakref
+from typing import Optional, Tuple
+
+
+class _Entity:
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self._values() == other._values()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={getattr(self, k)!r}' for k in self._fields())})"
+
+    def _fields(self):
+        return [k for k in self.__slots__ if k != '__weakref__']
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, k) for k in self._fields())
+
+
+class _Interned:
+    """Registry handing out one shared instance per ID while it is in use."""
+
+    def __init__(self):
+        self._instances = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, entity_id: Optional[str], factory):
+        if entity_id is None:  # e.g. local files; nothing to share
+            return factory()
+        with self._lock:
+            instance = self._instances.get(entity_id)
+            if instance is None:
+                instance = factory()
+                self._instances[entity_id] = instance
+            return instance
+
+
+class Artist(_Entity):
+    __slots__ = ('name', 'id', '__weakref__')
+    _interned = _Interned()
+
+    def __init__(self, name: str, id: Optional[str]):
+        self.name = name
+        self.id = id
+
+    @classmethod
+    def from_api(cls, item: dict) -> 'Artist':
+        return cls._interned.get(item.get('id'), lambda: cls(item['name'], item.get('id')))
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'id': self.id}
+
+
+class Album(_Entity):
+    """A simplified album, as embedded in tracks."""
+    __slots__ = ('name', 'id', 'artists', '__weakref__')
+    _interned = _Interned()
+
+    def __init__(self, name: str, id: Optional[str], artists: Tuple[Artist, ...]):
+        self.name = name
+        self.id = id
+        self.artists = artists
+
+    @classmethod
+    def from_api(cls, item: dict) -> 'Album':
+        return cls._interned.get(item.get('id'), lambda: cls(
+            item['name'], item.get('id'), tuple(Artist.from_api(a) for a in item['artists'])))
+
+    def to_dict(self) -> dict:
+        return _with_artists({'name': self.name, 'id': self.id}, [a.name for a in self.artists])
+
+
+class Track(_Entity):
+    __slots__ = ('name', 'id', 'album', 'artists', 'track_number', 'duration_ms', 'is_playable', 'is_playing')
+
+    def __init__(self, name: str, id: Optional[str], album: Optional[Album], artists: Tuple[Artist, ...],
+                 track_number: Optional[int] = None, duration_ms: Optional[int] = None,
+                 is_playable: bool = True, is_playing: Optional[bool] = None):
+        self.name = name
+        self.id = id
+        self.album = album
+        self.artists = artists
+        self.track_number = track_number
+        self.duration_ms = duration_ms
+        self.is_playable = is_playable
+        self.is_playing = is_playing
+
+    @classmethod
+    def from_api(cls, item: dict) -> 'Track':
+        album = item.get('album')
+        if album and 'artists' not in album:
+            # Projected responses (e.g. PLAYLIST_ITEM_FIELDS['display']) carry only part of the album.
+            # It is left out rather than interned, since the registry would hand it to complete parses too.
+            album = None
+        return cls(item['name'], item['id'], Album.from_api(album) if album else None,
+                   tuple(Artist.from_api(a) for a in item['artists']),
+                   item.get('track_number'), item.get('duration_ms'),
+                   item.get('is_playable', True), item.get('is_playing'))
+
+    def to_dict(self, detailed: bool = False) -> dict:
+        narrowed_item = {'name': self.name, 'id': self.id}
+        if self.is_playing is not None:
+            narrowed_item['is_playing'] = self.is_playing
+        if detailed:
+            narrowed_item['album'] = self.album.to_dict() if self.album else None
+            narrowed_item['track_number'] = self.track_number
+            narrowed_item['duration_ms'] = self.duration_ms
+        if not self.is_playable:
+            narrowed_item['is_playable'] = False
+        if detailed:
+            return _with_artists(narrowed_item, [a.to_dict() for a in self.artists])
+        return _with_artists(narrowed_item, [a.name for a in self.artists])
+
+
+class Playlist(_Entity):
+    __slots__ = ('name', 'id', 'owner', 'total_tracks', 'description', 'tracks')
+
+    def __init__(self, name: str, id: str, owner: str, total_tracks: int, description: Optional[str] = None,
+                 tracks: Optional[Tuple[Optional[Track], ...]] = None):
+        """
+        - owner: the owner's display name.
+        - tracks: the tracks included in the playlist object, or None if they were not parsed.
+        """
+        self.name = name
+        self.id = id
+        self.owner = owner
+        self.total_tracks = total_tracks
+        self.description = description
+        self.tracks = tracks
+
+    @classmethod
+    def from_api(cls, item: dict, with_tracks: bool = False) -> 'Playlist':
+        tracks = None
+        if with_tracks:
+            tracks = tuple(Track.from_api(t['track']) if t['track'] else None for t in item['tracks']['items'])
+        return cls(item['name'], item['id'], item['owner']['display_name'], item['tracks']['total'],
+                   item.get('description'), tracks)
+
+    def to_dict(self, username: Optional[str], detailed: bool = False) -> dict:
+        narrowed_item = {
+            'name': self.name,
+            'id': self.id,
+            'owner': self.owner,
+            'user_is_owner': self.owner == username,
+            'total_tracks': self.total_tracks,
+        }
+        if detailed:
+            narrowed_item['description'] = self.description
+            narrowed_item['tracks'] = [t.to_dict() if t else None for t in self.tracks or ()]
+        return narrowed_item
+
+
+def _with_artists(narrowed_item: dict, artists: list) -> dict:
+    if len(artists) == 1:
+        narrowed_item['artist'] = artists[0]
+    else:
+        narrowed_item['artists'] = artists
+    return narrowed_item
@@ -0,0 +1,198 @@
+"""
+Streaming export of the user's library (saved tracks, playlists and playlist
+contents) to a local NDJSON or CSV file.
+
+Records are written page by page as they are fetched, so memory use does not
+depend on library size. After every page the file is flushed and a small state
+file next to it records the cursor and byte length; an interrupted export picks
+up from the last completed page.
+
+Every checkpoint is also where a cancelled call stops (see calls.py), so a
+cancelled export can be resumed without losing anything it wrote.
+"""
+
+import csv
+import functools
+import io
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from . import calls
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_SECTIONS = ("saved_tracks", "playlists", "playlist_tracks")
+EXPORT_FIELDS = ["type", "playlist_id", "playlist_name", "id", "name", "artists", "album",
+                 "duration_ms", "added_at", "owner", "total_tracks"]
+
+
+def track_record(record_type: str, item: dict, **extra) -> Optional[dict]:
+    """Flattens a saved-track or playlist item ({'added_at', 'track'}) into an export record."""
+    track = item.get('track')
+    if not track or not track.get('id'):
+        return None
+    return {
+        'type': record_type,
+        **extra,
+        'id': track['id'],
+        'name': track.get('name'),
+        'artists': ", ".join(a['name'] for a in track.get('artists', [])),
+        'album': (track.get('album') or {}).get('name'),
+        'duration_ms': track.get('duration_ms'),
+        'added_at': item.get('added_at'),
+    }
+
+
+def playlist_record(playlist: dict) -> dict:
+    return {
+        'type': 'playlist',
+        'playlist_id': playlist['id'],
+        'playlist_name': playlist['name'],
+        'owner': playlist['owner'].get('display_name'),
+        'total_tracks': playlist['tracks']['total'],
+    }
+
+
+class LibraryExporter:
+    def __init__(self, client, path: str, fmt: Optional[str] = None, include: Optional[List[str]] = None):
+        """
+        - client: spotify_api.Client used to fetch pages.
+        - path: output file. The resume state is kept in '<path>.state.json'.
+        - fmt: 'ndjson' or 'csv'. Defaults from the file extension.
+        - include: sections to export, any of EXPORT_SECTIONS. Defaults to all.
+        """
+        self.client = client
+        self.path = Path(path)
+        self.state_path = self.path.with_name(self.path.name + ".state.json")
+        self.fmt = fmt or ("csv" if self.path.suffix.lower() == ".csv" else "ndjson")
+        self.include = list(include or EXPORT_SECTIONS)
+        if self.fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {self.fmt}. Must be one of {', '.join(EXPORT_FORMATS)}.")
+        unknown = set(self.include) - set(EXPORT_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown export sections {sorted(unknown)}. Must be any of {', '.join(EXPORT_SECTIONS)}.")
+
+    def run(self, resume: bool = True) -> dict:
+        """Runs (or resumes) the export and returns a summary."""
+        state = self._load_state() if resume else None
+        if state is not None and (not self.path.exists() or self.path.stat().st_size < state['bytes']):
+            # The output lost data the state counts as written; resuming would leave a gap in the file
+            state = None
+        resumed = state is not None
+        if state is None:
+            state = {'format': self.fmt, 'include': self.include, 'section': 'saved_tracks',
+                     'offset': 0, 'page_done': False, 'playlist': 0, 'track_offset': 0,
+                     'bytes': 0, 'records': 0}
+
+        mode = "r+b" if resumed else "wb"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, mode) as f:
+            # Drop anything written after the last checkpoint
+            f.truncate(state['bytes'])
+            f.seek(state['bytes'])
+            if state['bytes'] == 0 and self.fmt == "csv":
+                self._write(f, state, [dict(zip(EXPORT_FIELDS, EXPORT_FIELDS))], count=False)
+
+            if state['section'] == 'saved_tracks':
+                if 'saved_tracks' in self.include:
+                    self._export_saved_tracks(f, state)
+                state.update(section='playlists', offset=0)
+                self._checkpoint(state)
+
+            if 'playlists' in self.include or 'playlist_tracks' in self.include:
+                self._export_playlists(f, state)
+
+        self.state_path.unlink(missing_ok=True)
+        return {
+            "file": str(self.path),
+            "format": self.fmt,
+            "sections": self.include,
+            "records_written": state['records'],
+            "bytes_written": state['bytes'],
+            "resumed": resumed,
+        }
+
+    def _export_saved_tracks(self, f, state: dict):
+        while True:
+            # Items are turned into records while the page is decoded
+            page = self.client.get_saved_tracks_page(offset=state['offset'],
+                                                     narrow=functools.partial(track_record, 'saved_track'))
+            items = page.get('items', [])
+            self._write(f, state, items)
+            state['offset'] += len(items)
+            self._checkpoint(state)
+            if not page.get('next') or not items:
+                break
+
+    def _export_playlists(self, f, state: dict):
+        while True:
+            page = self.client.get_playlists_page(offset=state['offset'])
+            playlists = [p for p in page.get('items', []) if p]
+            if not state['page_done']:
+                if 'playlists' in self.include:
+                    self._write(f, state, [playlist_record(p) for p in playlists])
+                state.update(page_done=True, playlist=0, track_offset=0)
+                self._checkpoint(state)
+
+            if 'playlist_tracks' in self.include:
+                for playlist in playlists[state['playlist']:]:
+                    self._export_playlist_tracks(f, state, playlist)
+                    state.update(playlist=state['playlist'] + 1, track_offset=0)
+                    self._checkpoint(state)
+
+            state.update(offset=state['offset'] + len(page.get('items', [])), page_done=False)
+            self._checkpoint(state)
+            if not page.get('next') or not playlists:
+                break
+
+    def _export_playlist_tracks(self, f, state: dict, playlist: dict):
+        extra = {'playlist_id': playlist['id'], 'playlist_name': playlist['name']}
+        while True:
+            page = self.client.get_playlist_items_page(
+                playlist['id'], offset=state['track_offset'], projection='display',
+                narrow=functools.partial(track_record, 'playlist_track', **extra))
+            items = page.get('items', [])
+            self._write(f, state, items)
+            state['track_offset'] += len(items)
+            self._checkpoint(state)
+            if not page.get('next') or not items:
+                break
+
+    def _write(self, f, state: dict, records: List[Optional[dict]], count: bool = True):
+        records = [r for r in records if r]
+        buffer = io.StringIO()
+        if self.fmt == "csv":
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+            writer.writerows(records)
+        else:
+            for record in records:
+                buffer.write(json.dumps(record, ensure_ascii=False))
+                buffer.write("\n")
+        f.write(buffer.getvalue().encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+        state['bytes'] = f.tell()
+        if count:
+            state['records'] += len(records)
+
+    def _checkpoint(self, state: dict):
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        calls.partial("export", {"file": str(self.path), "records_written": state['records'],
+                                 "bytes_written": state['bytes']})
+        calls.progress(state['records'], message=f"Exported {state['records']} records ({state['section']})")
+        calls.check()
+
+    def _load_state(self) -> Optional[dict]:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Only resume an export of the same shape; anything else starts over
+        if state.get('format') != self.fmt or state.get('include') != self.include:
+            return None
+        return state
@@ -0,0 +1,277 @@
+"""
+Validating HTTP cache for Spotify Web API responses.
+
+GET responses that carry an ETag or a positive max-age are kept with their
+validators, keyed by URL. While an entry is fresh (per Cache-Control max-age)
+it is served without a request; after that it is revalidated with
+If-None-Match, and a 304 answer is turned back into the cached 200 response.
+The server only ever acts for one user, so entries are not keyed by token.
+
+Entries live in memory up to a byte budget. Optionally, entries evicted from
+memory spill to files under CACHE_DIR/http and are read back from there.
+
+A response requested with stream=True (see streaming.py) is handed on
+unread; its body is stored as the caller reads it, once it was read to the end.
+
+A write (PUT/POST/DELETE) drops the cached entries of the resource it changed,
+e.g. a POST to /playlists/{id}/tracks drops /playlists/{id} and its tracks, so
+fresh entries never hide the server's own changes.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE = os.getenv("SPOTIFY_HTTP_CACHE", "1").lower() in ("1", "true", "yes")
+# Response bytes kept in memory
+HTTP_CACHE_SIZE = int(float(os.getenv("SPOTIFY_HTTP_CACHE_MB", "32")) * 1024 * 1024)
+# Bytes kept on disk for entries evicted from memory; 0 disables the disk spill
+HTTP_CACHE_SPILL_SIZE = int(float(os.getenv("SPOTIFY_HTTP_CACHE_SPILL_MB", "0")) * 1024 * 1024)
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+
+# Headers kept with a cached response; the rest describe the original transfer
+STORED_HEADERS = ("Content-Type", "ETag", "Cache-Control")
+MAX_AGE = re.compile(r"max-age=(\d+)")
+# /v1/<collection>/<id> or /v1/me/<collection>: what a write to a path below it changes
+RESOURCE_ROOT = re.compile(r"^(/v1/me/[^/]+|/v1/[^/]+/[^/]+)")
+
+
+class HTTPCache:
+    def __init__(self, max_bytes: int = HTTP_CACHE_SIZE, spill_bytes: int = HTTP_CACHE_SPILL_SIZE,
+                 spill_dir: Path = HTTP_CACHE_DIR):
+        """
+        - max_bytes: response bytes kept in memory; least recently used entries are evicted beyond this.
+        - spill_bytes: bytes of evicted entries kept under spill_dir, or 0 to drop them.
+        """
+        self.max_bytes = max_bytes
+        self.spill_bytes = spill_bytes
+        self.spill_dir = Path(spill_dir)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._size = 0
+        self._spilled_since_prune = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+                return entry
+        entry = self._read_spilled(url)
+        if entry is not None:
+            self.put(url, entry)
+        return entry
+
+    def put(self, url: str, entry: dict):
+        spilled = []
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._size -= len(previous['body'])
+            self._entries[url] = entry
+            self._size += len(entry['body'])
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                evicted_url, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted['body'])
+                spilled.append((evicted_url, evicted))
+        if self.spill_bytes:
+            for evicted_url, evicted in spilled:
+                self._spill(evicted_url, evicted)
+
+    def invalidate(self, url: str):
+        """Drops the entries of the resource a write to url changes."""
+        root = RESOURCE_ROOT.match(urlsplit(url).path)
+        if root is None:
+            return
+        prefixes = [root.group(1)]
+        if prefixes[0].startswith(("/v1/playlists/", "/v1/users/")):
+            prefixes.append("/v1/me/playlists")  # playlist names, counts and new playlists show up here
+        with self._lock:
+            for cached_url in [u for u in self._entries if _path_under(u, prefixes)]:
+                self._size -= len(self._entries.pop(cached_url)['body'])
+        if self.spill_bytes and self.spill_dir.is_dir():
+            for path in self.spill_dir.glob("*.json"):
+                try:
+                    if _path_under(json.loads(path.read_text(encoding="utf-8"))['url'], prefixes):
+                        path.unlink()
+                except (OSError, ValueError, KeyError):
+                    continue
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses,
+                    'entries': len(self._entries), 'bytes': self._size}
+
+    def _spill_path(self, url: str) -> Path:
+        return self.spill_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def _spill(self, url: str, entry: dict):
+        path = self._spill_path(url)
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            record = dict(entry, url=url, body=base64.b64encode(entry['body']).decode('ascii'))
+            tmp_path.write_text(json.dumps(record), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error spilling HTTP cache entry to {path}: {e}")
+            return
+        self._spilled_since_prune += len(entry['body'])
+        if self._spilled_since_prune > self.spill_bytes // 10:
+            self._spilled_since_prune = 0
+            self._prune_spilled()
+
+    def _read_spilled(self, url: str) -> Optional[dict]:
+        if not self.spill_bytes:
+            return None
+        path = self._spill_path(url)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+            path.unlink()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable HTTP cache file {path}: {e}")
+            return None
+        if record.pop('url', None) != url:
+            return None
+        record['body'] = base64.b64decode(record['body'])
+        return record
+
+    def _prune_spilled(self):
+        """Deletes the oldest spilled entries beyond spill_bytes."""
+        try:
+            files = sorted(((p.stat(), p) for p in self.spill_dir.glob("*.json")), key=lambda f: f[0].st_mtime)
+        except OSError:
+            return
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in files:
+            if total <= self.spill_bytes:
+                break
+            try:
+                path.unlink()
+                total -= stat.st_size
+            except OSError:
+                continue
+
+
+class CachingAdapter(HTTPAdapter):
+    """HTTPAdapter that answers GET requests from an HTTPCache, revalidating with If-None-Match."""
+
+    def __init__(self, cache: HTTPCache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != 'GET':
+            response = super().send(request, **kwargs)
+            if response.ok:
+                self.cache.invalidate(request.url)
+            return response
+
+        entry = self.cache.get(request.url)
+        if entry is not None and entry['expires'] > time.time():
+            self.cache.hits += 1
+            return self._cached_response(request, entry)
+
+        if entry is not None and entry['headers'].get('ETag'):
+            request = request.copy()
+            request.headers['If-None-Match'] = entry['headers']['ETag']
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated += 1
+            entry = dict(entry, expires=_expires(response.headers),
+                         headers=dict(entry['headers'], **_stored_headers(response.headers)))
+            self.cache.put(request.url, entry)
+            response.close()
+            return self._cached_response(request, entry)
+
+        self.cache.misses += 1
+        if response.status_code == 200 and _cacheable(response.headers):
+            url = request.url
+            entry = {'expires': _expires(response.headers), 'headers': _stored_headers(response.headers)}
+            if kwargs.get('stream'):
+                # Left for the caller to read incrementally; stored once it has been read in full
+                response.raw = _StoringBody(response.raw, lambda body: self.cache.put(url, dict(entry, body=body)))
+            else:
+                # Reads the body; spotipy would read it right away anyway
+                self.cache.put(url, dict(entry, body=response.content))
+        return response
+
+    @staticmethod
+    def _cached_response(request: requests.PreparedRequest, entry: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        # There is no connection behind it; iter_content() replays the stored body
+        response._content_consumed = True
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class _StoringBody:
+    """Wraps a urllib3 response so its decoded body is passed to on_complete once streamed to the end."""
+
+    def __init__(self, raw, on_complete: Callable[[bytes], None]):
+        self._raw = raw
+        self._on_complete = on_complete
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        chunks = []
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            chunks.append(chunk)
+            yield chunk
+        self._on_complete(b"".join(chunks))
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+def _path_under(url: str, prefixes) -> bool:
+    path = urlsplit(url).path
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in prefixes)
+
+
+def _stored_headers(headers) -> dict:
+    return {name: headers[name] for name in STORED_HEADERS if name in headers}
+
+
+def _cacheable(headers) -> bool:
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-store' in cache_control:
+        return False
+    return 'ETag' in headers or _expires(headers) > time.time()
+
+
+def _expires(headers) -> float:
+    """Time until which a response may be served without revalidating."""
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-cache' in cache_control:
+        return 0.0
+    max_age = MAX_AGE.search(cache_control)
+    return time.time() + int(max_age.group(1)) if max_age else 0.0
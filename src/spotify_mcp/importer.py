@@ -0,0 +1,120 @@
+"""
+Streaming readers for external track lists (CSV, M3U or plain "artist - title" text).
+
+Files are read line by line and yielded as entry dicts, so an import never
+holds more of the input in memory than the chunk currently being resolved.
+"""
+
+import csv
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, TextIO
+
+ENTRY_SEPARATORS = (" - ", " – ", " — ")
+TRACK_LINK_PATTERN = re.compile(r"(?:spotify:track:|open\.spotify\.com/(?:[\w-]+/)?track/)([A-Za-z0-9]{22})")
+
+# Header names (lower-cased) recognised in CSV files, including Exportify's column names
+CSV_ARTIST_COLUMNS = ("artist", "artist name", "artist name(s)", "artists")
+CSV_TITLE_COLUMNS = ("title", "track", "track name", "name", "song")
+CSV_ISRC_COLUMNS = ("isrc",)
+CSV_URI_COLUMNS = ("uri", "track uri", "spotify uri", "url")
+
+
+def iter_entries(path: str) -> Iterator[dict]:
+    """
+    Yields one entry per track in the file: {'line', 'text', 'artist', 'title', 'isrc', 'track_id'}.
+    The format is picked from the extension: .csv, .m3u/.m3u8, anything else is plain text.
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if suffix == ".csv":
+            yield from _iter_csv(f)
+        elif suffix in (".m3u", ".m3u8"):
+            yield from _iter_m3u(f)
+        else:
+            yield from _iter_text(f)
+
+
+def chunked(entries: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    """Groups a stream of entries into lists of at most size items."""
+    iterator = iter(entries)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_entry(text: str, line: int) -> Optional[dict]:
+    """Parses a single "artist - title" line (or a Spotify track link). Returns None for blank lines."""
+    text = text.strip()
+    if not text:
+        return None
+    entry = _entry(line, text)
+    link = TRACK_LINK_PATTERN.search(text)
+    if link:
+        entry['track_id'] = link.group(1)
+        return entry
+    for separator in ENTRY_SEPARATORS:
+        if separator in text:
+            artist, title = text.split(separator, 1)
+            entry['artist'], entry['title'] = artist.strip(), title.strip()
+            break
+    return entry
+
+
+def _entry(line: int, text: str) -> dict:
+    return {'line': line, 'text': text, 'artist': None, 'title': None, 'isrc': None, 'track_id': None}
+
+
+def _iter_text(f: TextIO) -> Iterator[dict]:
+    for line, text in enumerate(f, start=1):
+        if text.lstrip().startswith("#"):
+            continue
+        entry = parse_entry(text, line)
+        if entry:
+            yield entry
+
+
+def _iter_m3u(f: TextIO) -> Iterator[dict]:
+    # Only '#EXTINF:<duration>,<artist> - <title>' lines describe a track; the path lines that follow do not.
+    # Track links on their own line (as exported by some tools) are accepted too.
+    for line, text in enumerate(f, start=1):
+        text = text.strip()
+        if text.startswith("#EXTINF:"):
+            entry = parse_entry(text.split(",", 1)[-1], line)
+        elif TRACK_LINK_PATTERN.search(text):
+            entry = parse_entry(text, line)
+        else:
+            continue
+        if entry:
+            yield entry
+
+
+def _iter_csv(f: TextIO) -> Iterator[dict]:
+    reader = csv.DictReader(f)
+    if not reader.fieldnames:
+        return
+    columns = {name.strip().lower(): name for name in reader.fieldnames if name}
+
+    def column(candidates):
+        return next((columns[c] for c in candidates if c in columns), None)
+
+    artist_col = column(CSV_ARTIST_COLUMNS)
+    title_col = column(CSV_TITLE_COLUMNS)
+    isrc_col = column(CSV_ISRC_COLUMNS)
+    uri_col = column(CSV_URI_COLUMNS)
+
+    for row in reader:
+        line = reader.line_num
+        artist = (row.get(artist_col) or "").split(",")[0].strip() if artist_col else ""
+        title = (row.get(title_col) or "").strip() if title_col else ""
+        text = " - ".join(p for p in (artist, title) if p)
+        entry = _entry(line, text or ",".join(v for v in row.values() if isinstance(v, str)))
+        entry['artist'], entry['title'] = artist or None, title or None
+        if isrc_col and row.get(isrc_col):
+            entry['isrc'] = row[isrc_col].strip()
+        if uri_col and row.get(uri_col):
+            link = TRACK_LINK_PATTERN.search(row[uri_col])
+            if link:
+                entry['track_id'] = link.group(1)
+        if entry['artist'] or entry['title'] or entry['isrc'] or entry['track_id']:
+            yield entry
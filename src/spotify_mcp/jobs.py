@@ -0,0 +1,223 @@
+"""
+Background jobs for long-running tools.
+
+A job runs a tool's work on a small dedicated worker pool and returns its ID
+right away. Its status, progress, partial output and result are kept in one
+JSON file per job under CACHE_DIR/jobs, so they can still be read after the
+client reconnects or the server restarts. Jobs that were still running when
+their server process stopped are reported as 'interrupted'.
+
+Cancelled jobs (and foreground calls cancelled by the client, which are
+recorded here too) keep their partial output, so it is clear which side
+effects already happened.
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from . import calls, scheduler
+from .cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = CACHE_DIR / "jobs"
+# Jobs run at once; kept small so heavy work leaves room for interactive calls
+JOB_WORKERS = int(os.getenv("SPOTIFY_JOB_WORKERS", "2"))
+# Seconds finished jobs are kept on disk
+JOB_RETENTION = float(os.getenv("SPOTIFY_JOB_RETENTION", str(7 * 24 * 3600)))
+# Progress and partial results are written to disk at most this often (and once more after the last
+# change); status changes are written right away
+PROGRESS_SAVE_INTERVAL = 1.0
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobManager:
+    def __init__(self, directory: Path = JOBS_DIR, workers: int = JOB_WORKERS):
+        """
+        - directory: where job records are persisted.
+        - workers: jobs run concurrently; the rest wait in the queue.
+        """
+        self.directory = Path(directory)
+        self._jobs: Dict[str, dict] = {}
+        self._saved_at: Dict[str, float] = {}
+        self._pending_saves: Dict[str, threading.Timer] = {}
+        self._contexts: Dict[str, calls.CallContext] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="spotify-job")
+        self._load()
+
+    def submit(self, tool: str, arguments: dict, func: Callable[[], dict], timeout: Optional[float] = None) -> dict:
+        """
+        Queues func to run as a job for tool and returns the new job record.
+        - timeout: seconds the job may run once started, or None for no limit.
+        """
+        job = _new_job(tool, arguments, 'queued')
+        with self._lock:
+            self._jobs[job['id']] = job
+        self._save(job['id'])
+        self._executor.submit(self._run, job['id'], func, timeout)
+        return self.get(job['id'])
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancels a queued or running job. A running job stops at its next Spotify request."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            context = self._contexts.get(job_id)
+            was_queued = job['status'] == 'queued'
+            if was_queued:
+                job.update(status='cancelled', error="Cancelled", updated_at=_timestamp())
+        if was_queued:
+            self._save(job_id)
+        elif context is not None:
+            context.cancel()
+        return self.get(job_id)
+
+    def record_cancelled(self, tool: str, arguments: dict, context: calls.CallContext) -> dict:
+        """Records a foreground call the client cancelled, with the partial output it produced."""
+        job = _new_job(tool, arguments, 'cancelled')
+        job.update(progress={'done': context.done, 'total': context.total, 'message': context.message},
+                   partial=dict(context.partial_results), error="Cancelled by the client")
+        with self._lock:
+            self._jobs[job['id']] = job
+        self._save(job['id'])
+        return self.get(job['id'])
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def list(self) -> List[dict]:
+        """Summaries of all known jobs, newest first."""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j['created_at'], reverse=True)
+            return [{k: job[k] for k in ('id', 'tool', 'status', 'created_at', 'updated_at', 'progress')}
+                    for job in jobs]
+
+    def _run(self, job_id: str, func: Callable[[], dict], timeout: Optional[float]):
+        # The deadline counts from the start of the job, not from when it was queued
+        context = calls.CallContext(on_progress=lambda c: self._progress(job_id, c),
+                                    on_partial=lambda c, key: self._partial(job_id, c, key),
+                                    timeout=timeout)
+        with self._lock:
+            job = self._jobs[job_id]
+            if job['status'] != 'queued':
+                return  # cancelled while queued
+            job.update(status='running', updated_at=_timestamp())
+            self._contexts[job_id] = context
+        try:
+            self._save(job_id)
+            try:
+                # Jobs are never waited on interactively; their requests yield to everything else
+                with scheduler.priority(scheduler.BULK):
+                    result = calls.run(context, func)
+            except calls.DeadlineExceeded:
+                logger.info(f"Job {job_id} ran out of time")
+                self._update(job_id, status='failed', partial=dict(context.partial_results),
+                             error="Deadline exceeded before a result was available")
+            except calls.Cancelled:
+                logger.info(f"Job {job_id} cancelled")
+                self._update(job_id, status='cancelled', partial=dict(context.partial_results), error="Cancelled")
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                self._update(job_id, status='failed', error=str(e))
+            else:
+                self._update(job_id, status='done', result=result)
+        finally:
+            with self._lock:
+                self._contexts.pop(job_id, None)
+
+    def _progress(self, job_id: str, context: calls.CallContext):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['progress'] = {'done': context.done, 'total': context.total, 'message': context.message}
+            job['updated_at'] = _timestamp()
+        self._save_soon(job_id)
+
+    def _partial(self, job_id: str, context: calls.CallContext, key: str):
+        with self._lock:
+            self._jobs[job_id].update(partial=dict(context.partial_results), updated_at=_timestamp())
+        # Partial output grows with the job; rewriting the file on every addition would grow quadratically
+        self._save_soon(job_id)
+
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            self._jobs[job_id].update(changes, updated_at=_timestamp())
+        self._save(job_id)
+
+    def _save_soon(self, job_id: str):
+        """Saves the job now, or once PROGRESS_SAVE_INTERVAL has passed since the last save."""
+        with self._lock:
+            wait = self._saved_at.get(job_id, 0) + PROGRESS_SAVE_INTERVAL - time.monotonic()
+            if wait > 0:
+                if job_id not in self._pending_saves:
+                    timer = threading.Timer(wait, self._save, (job_id,))
+                    timer.daemon = True
+                    self._pending_saves[job_id] = timer
+                    timer.start()
+                return
+        self._save(job_id)
+
+    def _save(self, job_id: str):
+        with self._lock:
+            pending = self._pending_saves.pop(job_id, None)
+            if pending is not None:
+                pending.cancel()  # this save includes its changes
+            content = json.dumps(self._jobs[job_id], ensure_ascii=False)
+            self._saved_at[job_id] = time.monotonic()
+        path = self.directory / f"{job_id}.json"
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(content, encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Could not save job {job_id}: {e}")
+
+    def _load(self):
+        if not self.directory.is_dir():
+            return
+        for path in self.directory.glob("*.json"):
+            try:
+                if time.time() - path.stat().st_mtime > JOB_RETENTION:
+                    path.unlink()
+                    continue
+                job = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load job file {path}: {e}")
+                continue
+            self._jobs[job['id']] = job
+            if job['status'] in ACTIVE_STATUSES:
+                # The process running it is gone; the partial output is all there will be
+                self._update(job['id'], status='interrupted')
+
+
+def _new_job(tool: str, arguments: dict, status: str) -> dict:
+    now = _timestamp()
+    return {
+        'id': secrets.token_hex(6),
+        'tool': tool,
+        'arguments': arguments,
+        'status': status,
+        'created_at': now,
+        'updated_at': now,
+        'progress': {'done': 0, 'total': None, 'message': None},
+        'partial': {},
+        'result': None,
+        'error': None,
+    }
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
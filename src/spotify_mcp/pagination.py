@@ -0,0 +1,127 @@
+"""
+Output budgets and cursor pagination for large tool results.
+
+A result is cut to a budget of list items and/or encoded bytes. Truncation is
+deterministic: list fields are filled round-robin in key order until the
+budget is spent. The full result stays in memory under an opaque cursor, so
+the follow-up call continues from there without asking Spotify again.
+
+Results made of several entries (one per query or per looked-up item) are cut
+entry by entry: each gets an equal share of the byte budget and a cursor of its
+own, so their total stays within the budget.
+"""
+
+import base64
+import binascii
+import json
+import os
+import secrets
+from typing import Any, Optional
+
+from .cache import TTLCache
+
+DEFAULT_MAX_ITEMS = int(os.getenv("SPOTIFY_MAX_RESPONSE_ITEMS", "50"))
+DEFAULT_MAX_BYTES = int(os.getenv("SPOTIFY_MAX_RESPONSE_BYTES", "24000"))
+CURSOR_TTL = float(os.getenv("SPOTIFY_CURSOR_TTL", "900"))
+
+
+class CursorError(ValueError):
+    pass
+
+
+class ResultPager:
+    def __init__(self, ttl: float = CURSOR_TTL, max_results: int = 64):
+        """
+        - ttl: seconds a truncated result stays available for follow-up calls.
+        - max_results: truncated results kept at once; the least recently used are dropped.
+        """
+        self._results = TTLCache(ttl, max_entries=max_results)
+
+    def first_page(self, tool: str, result: Any, max_items: Optional[int] = None,
+                   max_bytes: Optional[int] = None) -> Any:
+        """Returns result cut to the budget, with a 'next_cursor' if anything was left out."""
+        token = secrets.token_urlsafe(12)
+        return self._page(tool, token, result, {}, max_items, max_bytes)
+
+    def first_pages(self, tool: str, entries: Any, max_items: Optional[int] = None,
+                    max_bytes: Optional[int] = None) -> Any:
+        """
+        Cuts every entry of a list, or of a dict keyed by e.g. query, to an equal share of max_bytes.
+        Each truncated entry has its own 'next_cursor'.
+        """
+        max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        share = max(max_bytes // max(len(entries), 1), 1) if max_bytes else 0
+        if isinstance(entries, dict):
+            return {key: self.first_page(tool, entry, max_items, share) for key, entry in entries.items()}
+        return [self.first_page(tool, entry, max_items, share) for entry in entries]
+
+    def next_page(self, tool: str, cursor: str, max_items: Optional[int] = None,
+                  max_bytes: Optional[int] = None) -> Any:
+        """Returns the page after cursor, from the stored result."""
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            token, offsets = state['t'], state['o']
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            raise CursorError("Invalid cursor.")
+        stored = self._results.peek(token)
+        if stored is None or stored[0] != tool:
+            raise CursorError("Cursor expired or unknown. Repeat the original call without a cursor.")
+        return self._page(tool, token, stored[1], offsets, max_items, max_bytes)
+
+    def _page(self, tool: str, token: str, result: Any, offsets: dict,
+              max_items: Optional[int], max_bytes: Optional[int]) -> Any:
+        max_items = DEFAULT_MAX_ITEMS if max_items is None else max_items
+        max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+
+        # Lists that can be paged: the result itself, or its top-level list fields
+        if isinstance(result, list):
+            fields = {'items': result}
+            base = {}
+        elif isinstance(result, dict):
+            fields = {k: v for k, v in result.items() if isinstance(v, list)}
+            base = {k: v for k, v in result.items() if k not in fields}
+        else:
+            return result
+
+        starts = {k: offsets.get(k, 0) for k in fields}
+        taken = {k: [] for k in fields}
+        used_bytes = _size(base) + sum(_size(k) + 3 for k in fields)
+        used_items = 0
+        progress = True
+        while progress:
+            progress = False
+            for key, items in fields.items():
+                position = starts[key] + len(taken[key])
+                if position >= len(items) or (max_items and len(taken[key]) >= max_items):
+                    continue
+                item_bytes = _size(items[position]) + 1
+                # Always return at least one item so paging makes progress
+                if max_bytes and used_items and used_bytes + item_bytes > max_bytes:
+                    continue
+                taken[key].append(items[position])
+                used_bytes += item_bytes
+                used_items += 1
+                progress = True
+
+        next_offsets = {k: starts[k] + len(taken[k]) for k in fields}
+        remaining = {k: len(fields[k]) - next_offsets[k] for k in fields if len(fields[k]) > next_offsets[k]}
+        if not remaining and not offsets:
+            return result
+
+        self._results.set(token, (tool, result))
+        page = dict(base)
+        page.update(taken)
+        page['page'] = {
+            'offsets': starts,
+            'remaining': remaining,
+            'next_cursor': _cursor(token, next_offsets) if remaining else None,
+        }
+        return page
+
+
+def _cursor(token: str, offsets: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'t': token, 'o': offsets}, separators=(",", ":")).encode()).decode()
+
+
+def _size(obj: Any) -> int:
+    return len(json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
@@ -0,0 +1,90 @@
+"""
+Adaptive background poller for the player snapshot (see Client.refresh_player_state).
+
+The poller refreshes quickly while music is playing and right after the
+current track is due to end, backs off exponentially while playback is idle,
+and stops polling entirely when the client has been inactive for a while and
+nobody is subscribed to player resources. Any activity wakes it up again.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PLAYER_POLLING = os.getenv("SPOTIFY_PLAYER_POLLING", "0").lower() in ("1", "true", "yes")
+POLL_PLAYING_INTERVAL = float(os.getenv("SPOTIFY_POLL_PLAYING_INTERVAL", "3"))
+POLL_IDLE_MIN_INTERVAL = float(os.getenv("SPOTIFY_POLL_IDLE_MIN_INTERVAL", "10"))
+POLL_IDLE_MAX_INTERVAL = float(os.getenv("SPOTIFY_POLL_IDLE_MAX_INTERVAL", "60"))
+POLL_ACTIVITY_TIMEOUT = float(os.getenv("SPOTIFY_POLL_ACTIVITY_TIMEOUT", "600"))
+
+# Poll this long after the current track is due to end, so the next one has started
+TRACK_BOUNDARY_MARGIN = 0.5
+
+
+class PlaybackPoller:
+    def __init__(self, client, on_update: Callable[[], Awaitable[None]],
+                 keep_alive: Callable[[], bool] = lambda: False):
+        """
+        - client: spotify_api.Client whose player snapshot is refreshed.
+        - on_update: awaited after every poll, e.g. to flush resource notifications.
+        - keep_alive: returns True while polling should continue without client activity (e.g. subscriptions).
+        """
+        self.client = client
+        self.on_update = on_update
+        self.keep_alive = keep_alive
+        self._wake = asyncio.Event()
+        self._last_activity = time.monotonic()
+        self._idle_interval = POLL_IDLE_MIN_INTERVAL
+
+    def touch(self):
+        """Records client activity, resuming polling if it was stopped."""
+        self._last_activity = time.monotonic()
+        if not self.client.use_player_state:
+            self._wake.set()
+
+    def wake(self):
+        """Polls again right away, e.g. after a playback command."""
+        self._last_activity = time.monotonic()
+        self._wake.set()
+
+    async def run(self):
+        try:
+            while True:
+                if time.monotonic() - self._last_activity > POLL_ACTIVITY_TIMEOUT and not self.keep_alive():
+                    logger.info("No client activity; pausing playback polling")
+                    self.client.use_player_state = False
+                    self._wake.clear()
+                    await self._wake.wait()
+
+                state = None
+                try:
+                    state = await asyncio.to_thread(self.client.refresh_player_state)
+                    self.client.use_player_state = True
+                except Exception as e:
+                    logger.error(f"Error polling playback state: {e}")
+                    self.client.use_player_state = False
+                await self.on_update()
+
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self._next_interval(state))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.client.use_player_state = False
+
+    def _next_interval(self, state: Optional[dict]) -> float:
+        if state and state['is_playing']:
+            self._idle_interval = POLL_IDLE_MIN_INTERVAL
+            remaining = max(state['duration_ms'] - state['progress_ms'], 0) / 1000
+            if remaining < POLL_PLAYING_INTERVAL:
+                return remaining + TRACK_BOUNDARY_MARGIN
+            return POLL_PLAYING_INTERVAL
+
+        interval = self._idle_interval
+        self._idle_interval = min(self._idle_interval * 2, POLL_IDLE_MAX_INTERVAL)
+        return interval
@@ -0,0 +1,156 @@
+"""
+Vectorized ranking for Discover candidates.
+
+Candidates are packed into NumPy arrays (popularity, release year and a TF-IDF
+genre matrix over a vocabulary built from the user's top artists) so a pool of
+thousands of tracks can be scored in one pass, then re-ranked with Maximal
+Marginal Relevance (MMR) to keep the final list diverse.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_POPULARITY_WEIGHT = 0.4
+DEFAULT_GENRE_WEIGHT = 0.4
+DEFAULT_RECENCY_WEIGHT = 0.2
+DEFAULT_DIVERSITY = 0.3
+DEFAULT_MAX_PER_ARTIST = 3
+
+
+def build_genre_vocabulary(top_artists: List[Dict], seed_genres: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Build a genre -> column index mapping from the user's top artists and the seed genres.
+    - top_artists: raw artist objects from the top-items endpoint.
+    - seed_genres: genres that must be present even if none of the top artists carry them.
+    """
+    vocabulary = {}
+    for genre in seed_genres:
+        vocabulary.setdefault(genre.lower(), len(vocabulary))
+    for artist in top_artists:
+        for genre in artist.get('genres', []):
+            vocabulary.setdefault(genre.lower(), len(vocabulary))
+    return vocabulary
+
+
+def release_year(release_date: Optional[str]) -> Optional[int]:
+    """Returns the year part of a Spotify release date ('1999', '1999-01' or '1999-01-31')."""
+    if not release_date:
+        return None
+    try:
+        return int(release_date[:4])
+    except ValueError:
+        return None
+
+
+def _genre_matrix(candidates: List[Dict], vocabulary: Dict[str, int]) -> np.ndarray:
+    """One-hot genre matrix (n x V), re-weighted by inverse document frequency and L2-normalized."""
+    matrix = np.zeros((len(candidates), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, candidate in enumerate(candidates):
+        for genre in candidate.get('genres', ()):
+            col = vocabulary.get(genre.lower())
+            if col is not None:
+                matrix[row, col] = 1.0
+
+    doc_freq = matrix.sum(axis=0)
+    idf = np.log((1.0 + len(candidates)) / (1.0 + doc_freq)) + 1.0
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _profile_vector(profile_genres: Dict[str, float], vocabulary: Dict[str, int]) -> np.ndarray:
+    vector = np.zeros(max(len(vocabulary), 1), dtype=np.float32)
+    for genre, weight in profile_genres.items():
+        col = vocabulary.get(genre.lower())
+        if col is not None:
+            vector[col] += weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def rank_candidates(candidates: List[Dict],
+                    vocabulary: Dict[str, int],
+                    profile_genres: Dict[str, float],
+                    seed_popularity: int = 50,
+                    seed_year: Optional[int] = None,
+                    limit: int = 30,
+                    popularity_weight: float = DEFAULT_POPULARITY_WEIGHT,
+                    genre_weight: float = DEFAULT_GENRE_WEIGHT,
+                    recency_weight: float = DEFAULT_RECENCY_WEIGHT,
+                    diversity: float = DEFAULT_DIVERSITY,
+                    max_per_artist: int = DEFAULT_MAX_PER_ARTIST) -> List[Dict]:
+    """
+    Score candidates in bulk and return the top `limit` after an MMR diversity re-rank.
+
+    Args:
+        candidates: Dicts with 'popularity', 'release_date', 'genres' and 'artist_id' keys
+        vocabulary: Genre -> column mapping from build_genre_vocabulary
+        profile_genres: Genre -> weight describing what the seed sounds like
+        seed_popularity: Popularity (0-100) the results should be close to
+        seed_year: Release year the results should be close to (None disables the recency term)
+        limit: Number of results to return
+        popularity_weight: Weight of popularity proximity in the relevance score
+        genre_weight: Weight of genre similarity to the profile in the relevance score
+        recency_weight: Weight of release-year proximity in the relevance score
+        diversity: MMR trade-off between 0 (pure relevance) and 1 (pure novelty)
+        max_per_artist: Hard cap of tracks from the same artist
+
+    Returns:
+        The selected candidates in ranked order, each annotated with a 'score'
+    """
+    if not candidates or limit <= 0:
+        return []
+
+    n = len(candidates)
+    popularity = np.fromiter((c.get('popularity') or 0 for c in candidates), dtype=np.float32, count=n)
+    years = np.fromiter((release_year(c.get('release_date')) or 0 for c in candidates), dtype=np.float32, count=n)
+    genres = _genre_matrix(candidates, vocabulary)
+
+    popularity_score = 1.0 - np.abs(popularity - seed_popularity) / 100.0
+    genre_score = genres @ _profile_vector(profile_genres, vocabulary)
+    if seed_year and years.any():
+        known = years > 0
+        span = max(float(np.ptp(years[known])), 1.0)
+        recency_score = np.where(known, 1.0 - np.abs(years - seed_year) / span, 0.0)
+    else:
+        recency_score = np.zeros(n, dtype=np.float32)
+
+    total_weight = (popularity_weight + genre_weight + recency_weight) or 1.0
+    relevance = (popularity_weight * popularity_score
+                 + genre_weight * genre_score
+                 + recency_weight * recency_score) / total_weight
+
+    # MMR: repeatedly pick the candidate that is most relevant while least similar to what is already picked.
+    # Similarity is genre cosine, with tracks by an already-picked artist treated as identical.
+    artist_ids = [c.get('artist_id') for c in candidates]
+    artist_codes = {a: i for i, a in enumerate(dict.fromkeys(a for a in artist_ids if a))}
+    artists = np.fromiter((artist_codes.get(a, -1) for a in artist_ids), dtype=np.int64, count=n)
+    artist_counts = np.zeros(len(artist_codes), dtype=np.int64)
+
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = []
+    while len(selected) < limit and available.any():
+        mmr = (1.0 - diversity) * relevance - diversity * max_similarity
+        mmr[~available] = -np.inf
+        pick = int(np.argmax(mmr))
+        selected.append(pick)
+        available[pick] = False
+
+        similarity = genres @ genres[pick]
+        artist = artists[pick]
+        if artist >= 0:
+            similarity[artists == artist] = 1.0
+            artist_counts[artist] += 1
+            if artist_counts[artist] >= max_per_artist:
+                available[artists == artist] = False
+        np.maximum(max_similarity, similarity, out=max_similarity)
+
+    ranked = []
+    for idx in selected:
+        candidate = dict(candidates[idx])
+        candidate['score'] = round(float(relevance[idx]), 4)
+        ranked.append(candidate)
+    return ranked
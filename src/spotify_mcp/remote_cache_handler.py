@@ -1,16 +1,92 @@
 """
 Custom cache handler that fetches/stores Spotify tokens from a remote backend.
 This allows the MCP to use tokens obtained via a web-based OAuth flow.
+
+The backend can be slow or asleep (e.g. a cold start), so calls to it go
+through a circuit breaker. After repeated failures the breaker opens and the
+backend is skipped until a single probe request succeeds again. Meanwhile the
+last token the backend returned, kept in a local file, is used for as long as
+it is valid.
 """
 
+import json
 import os
 import logging
+import threading
+import time
+from typing import Optional
+
 import requests
 from spotipy.cache_handler import CacheHandler
 
+from . import transport
+from .cache import CACHE_DIR
+
 logger = logging.getLogger(__name__)
 
 BACKEND_URL = os.getenv("SPOTIFY_BACKEND_URL", "https://gentle-mesa-48529-28750f66374b.herokuapp.com")
+# Seconds to wait for the backend when there is no usable local token
+BACKEND_TIMEOUT = float(os.getenv("SPOTIFY_BACKEND_TIMEOUT", "10"))
+# Seconds to wait for the backend when the local token could be used instead
+BACKEND_FALLBACK_TIMEOUT = float(os.getenv("SPOTIFY_BACKEND_FALLBACK_TIMEOUT", "2"))
+# Consecutive backend failures that open the circuit, and seconds before it is probed again
+BACKEND_FAILURE_THRESHOLD = int(os.getenv("SPOTIFY_BACKEND_FAILURE_THRESHOLD", "2"))
+BACKEND_RETRY_INTERVAL = float(os.getenv("SPOTIFY_BACKEND_RETRY_INTERVAL", "30"))
+
+# Last known good token, used while the backend is unavailable
+TOKEN_FILE = CACHE_DIR / "token.json"
+# A token this close to expiry is not used as a fallback (spotipy refreshes tokens with the same margin)
+TOKEN_EXPIRY_MARGIN = 60
+
+
+class BackendUnavailable(Exception):
+    """Raised when the backend failed or was skipped because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails fast for a while after repeated errors. Once retry_interval has passed, a single
+    call is let through as a probe: success closes the circuit, failure keeps it open.
+    """
+
+    def __init__(self, failure_threshold: int = BACKEND_FAILURE_THRESHOLD,
+                 retry_interval: float = BACKEND_RETRY_INTERVAL):
+        """
+        - failure_threshold: consecutive failures that open the circuit.
+        - retry_interval: seconds the circuit stays open before the next probe.
+        """
+        self.failure_threshold = failure_threshold
+        self.retry_interval = retry_interval
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a call may go through now."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.retry_interval:
+                self.state = 'half-open'
+                return True
+            return False  # open, or half-open with a probe already in flight
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("Token backend is reachable again")
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half-open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.error(f"Token backend unavailable; skipping it for {self.retry_interval:.0f}s")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
 
 
 class RemoteCacheHandler(CacheHandler):
@@ -19,53 +95,102 @@ class RemoteCacheHandler(CacheHandler):
     This enables sharing OAuth tokens between web app and MCP.
     """
 
-    def __init__(self, backend_url: str = None):
+    def __init__(self, backend_url: str = None, token_file=TOKEN_FILE, session: Optional[requests.Session] = None):
+        """
+        - backend_url: base URL of the token backend.
+        - token_file: where the last known good token is kept.
+        - session: HTTP session to send requests with, so connections to the backend are reused.
+        """
         self.backend_url = backend_url or BACKEND_URL
-        self._cached_token = None
+        self.session = session or requests.Session()
+        self.token_file = token_file
+        self.breaker = CircuitBreaker()
+        self._cached_token = self._load_local_token()
 
     def get_cached_token(self):
-        """Fetch token from remote backend."""
+        """Fetch token from remote backend, falling back to the last known good token."""
+        fallback = self._cached_token if _is_usable(self._cached_token) else None
         try:
-            response = requests.get(
-                f"{self.backend_url}/spotify/mcp-token",
-                timeout=10
-            )
+            response = self._request("get", timeout=BACKEND_FALLBACK_TIMEOUT if fallback else BACKEND_TIMEOUT)
+        except BackendUnavailable:
+            return fallback
 
-            if response.status_code == 404:
-                logger.info("No token cached in backend. User needs to authenticate via web.")
-                return None
-
-            if not response.ok:
-                logger.error(f"Failed to fetch token from backend: {response.status_code}")
-                return None
+        if response.status_code == 404:
+            logger.info("No token cached in backend. User needs to authenticate via web.")
+            self._store_local_token(None)
+            return None
 
+        try:
             token_info = response.json()
-            self._cached_token = token_info
-            logger.info("Successfully fetched token from backend")
-            return token_info
+        except ValueError as e:
+            logger.error(f"Invalid token response from backend: {e}")
+            return fallback
+        self._store_local_token(token_info)
+        logger.info("Successfully fetched token from backend")
+        return token_info
 
+    def save_token_to_cache(self, token_info):
+        """Save token to remote backend, and locally so it is available while the backend is not."""
+        self._store_local_token(token_info)
+        try:
+            self._request("post", timeout=BACKEND_TIMEOUT, json={
+                "access_token": token_info.get("access_token"),
+                "refresh_token": token_info.get("refresh_token"),
+                "expires_in": token_info.get("expires_in", 3600),
+            })
+            logger.info("Successfully saved token to backend")
+        except BackendUnavailable:
+            logger.error("Token kept locally only; it is not saved to the backend")
+
+    def _request(self, method: str, timeout: float, **kwargs) -> requests.Response:
+        """
+        Calls the token endpoint through the circuit breaker. A 404 counts as an answer;
+        other error statuses and connection problems count as failures.
+        """
+        if not self.breaker.allow():
+            raise BackendUnavailable("circuit open")
+        try:
+            response = self.session.request(method, f"{self.backend_url}/spotify/mcp-token",
+                                            timeout=(min(transport.CONNECT_TIMEOUT, timeout), timeout), **kwargs)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching token from backend: {e}")
+            logger.error(f"Error calling token backend: {e}")
+            self.breaker.record_failure()
+            raise BackendUnavailable(str(e)) from e
+        if not response.ok and response.status_code != 404:
+            logger.error(f"Token backend returned {response.status_code}")
+            self.breaker.record_failure()
+            raise BackendUnavailable(f"status {response.status_code}")
+        self.breaker.record_success()
+        return response
+
+    def _load_local_token(self) -> Optional[dict]:
+        try:
+            with open(self.token_file, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable token file {self.token_file}: {e}")
             return None
 
-    def save_token_to_cache(self, token_info):
-        """Save token to remote backend."""
+    def _store_local_token(self, token_info: Optional[dict]):
+        if token_info == self._cached_token:
+            return
+        self._cached_token = token_info
         try:
-            response = requests.post(
-                f"{self.backend_url}/spotify/mcp-token",
-                json={
-                    "access_token": token_info.get("access_token"),
-                    "refresh_token": token_info.get("refresh_token"),
-                    "expires_in": token_info.get("expires_in", 3600),
-                },
-                timeout=10
-            )
-
-            if response.ok:
-                self._cached_token = token_info
-                logger.info("Successfully saved token to backend")
-            else:
-                logger.error(f"Failed to save token to backend: {response.status_code}")
+            if token_info is None:
+                self.token_file.unlink(missing_ok=True)
+                return
+            self.token_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.token_file.with_suffix(".tmp")
+            # The file holds credentials; keep it private to the user
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w", encoding="utf-8") as f:
+                json.dump(token_info, f)
+            os.replace(tmp_path, self.token_file)
+        except OSError as e:
+            logger.error(f"Error writing token file {self.token_file}: {e}")
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error saving token to backend: {e}")
+
+def _is_usable(token_info: Optional[dict]) -> bool:
+    return bool(token_info) and token_info.get('expires_at', 0) - TOKEN_EXPIRY_MARGIN > time.time()
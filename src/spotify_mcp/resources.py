@@ -0,0 +1,122 @@
+"""
+MCP resources backed by the client's caches.
+
+Resources:
+- spotify://playlists: the user's playlists.
+- spotify://playlist/{id}: a playlist with its tracks.
+- spotify://now-playing: the current track.
+- spotify://top/{time_range}: top tracks and artists for short_term, medium_term or long_term.
+
+Reads are served from the client caches, which tool calls keep fresh. Whenever
+a cache entry changes (or is invalidated by a modification), the matching
+resource is marked as updated and subscribed clients get a resources/updated
+notification on the next flush.
+"""
+
+import logging
+import threading
+from typing import Hashable, List
+
+import mcp.types as types
+from pydantic import AnyUrl
+
+from . import utils
+from .encoding import encode_response
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_MIME_TYPE = "application/json"
+TOP_TIME_RANGES = ("short_term", "medium_term", "long_term")
+
+
+class ResourceHub:
+    def __init__(self, client):
+        """
+        - client: spotify_api.Client whose caches back the resources.
+        """
+        self.client = client
+        self._subscriptions = {}  # uri -> session to notify
+        self._changed = set()
+        self._lock = threading.Lock()
+        client.library_cache.on_update = self._library_updated
+        client.top_items_cache.on_update = self._top_items_updated
+        client.player_cache.on_update = lambda key: self._mark_changed("spotify://now-playing")
+
+    def list_resources(self) -> List[types.Resource]:
+        resources = [
+            types.Resource(uri=AnyUrl("spotify://playlists"), name="Playlists",
+                           description="Your playlists", mimeType=RESOURCE_MIME_TYPE),
+            types.Resource(uri=AnyUrl("spotify://now-playing"), name="Now playing",
+                           description="The track currently playing", mimeType=RESOURCE_MIME_TYPE),
+        ]
+        for time_range in TOP_TIME_RANGES:
+            resources.append(types.Resource(uri=AnyUrl(f"spotify://top/{time_range}"), name=f"Top music ({time_range})",
+                                            description=f"Your top tracks and artists for {time_range}",
+                                            mimeType=RESOURCE_MIME_TYPE))
+        return resources
+
+    def list_templates(self) -> List[types.ResourceTemplate]:
+        return [
+            types.ResourceTemplate(uriTemplate="spotify://playlist/{id}", name="Playlist",
+                                   description="A playlist and its tracks", mimeType=RESOURCE_MIME_TYPE),
+            types.ResourceTemplate(uriTemplate="spotify://top/{time_range}", name="Top music",
+                                   description="Top tracks and artists for short_term, medium_term or long_term",
+                                   mimeType=RESOURCE_MIME_TYPE),
+        ]
+
+    def read(self, uri: str) -> str:
+        """Returns the JSON content of a resource, from the client caches where possible."""
+        kind, _, arg = uri.removeprefix("spotify://").partition("/")
+        match kind:
+            case "playlists" if not arg:
+                content = self.client.get_cached_playlists()
+            case "playlist" if arg:
+                content = self.client.get_cached_playlist(arg)
+            case "now-playing" if not arg:
+                content = self.client.get_cached_current_track()
+            case "top" if arg in TOP_TIME_RANGES:
+                content = {
+                    "time_range": arg,
+                    "top_tracks": [utils.parse_track(t) for t in self.client.get_top_tracks(arg)],
+                    "top_artists": [utils.parse_artist(a, detailed=True) for a in self.client.get_top_artists(arg)],
+                }
+            case _:
+                raise ValueError(f"Unknown resource: {uri}")
+        return encode_response(content)
+
+    def subscribe(self, uri: str, session):
+        with self._lock:
+            self._subscriptions[uri] = session
+
+    def unsubscribe(self, uri: str):
+        with self._lock:
+            self._subscriptions.pop(uri, None)
+
+    def has_subscriptions(self) -> bool:
+        with self._lock:
+            return bool(self._subscriptions)
+
+    async def flush(self):
+        """Sends resources/updated for every subscribed resource that changed since the last flush."""
+        with self._lock:
+            pending = [(uri, self._subscriptions[uri]) for uri in self._changed if uri in self._subscriptions]
+            self._changed.clear()
+        for uri, session in pending:
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception as e:
+                logger.error(f"Error notifying resource update for {uri}: {e}")
+
+    def _mark_changed(self, uri: str):
+        with self._lock:
+            self._changed.add(uri)
+
+    def _library_updated(self, key: Hashable):
+        if key == 'playlists':
+            self._mark_changed("spotify://playlists")
+        elif isinstance(key, tuple) and key[0] == 'playlist':
+            self._mark_changed(f"spotify://playlist/{key[1]}")
+
+    def _top_items_updated(self, key: Hashable):
+        _, time_range = key
+        self._mark_changed(f"spotify://top/{time_range}")
@@ -0,0 +1,132 @@
+"""
+Priority scheduling of outgoing Spotify requests.
+
+Every request carries the priority class of the call it serves: INTERACTIVE
+(playback and queue commands), NORMAL (lookups) or BULK (library-wide tools
+and background jobs). The class is kept in a context variable, so it follows the
+call into worker threads like the call context in calls.py does.
+
+Waiting requests are served highest class first, in arrival order within a
+class. Part of the request slots, and of the request rate budget when one is
+configured, is held back for INTERACTIVE requests, so a pause or skip never
+waits behind a long run of catalog requests. After Spotify answers 429, the
+other classes also hold off for the Retry-After period, and the rejected
+request is sent again once it has passed (see spotify_api.Spotify).
+"""
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Iterator, Optional
+
+from . import calls
+
+INTERACTIVE = 0
+NORMAL = 1
+BULK = 2
+
+# Share of request slots (and of RATE_LIMIT) only INTERACTIVE requests may use
+INTERACTIVE_RESERVE = float(os.getenv("SPOTIFY_INTERACTIVE_RESERVE", "0.25"))
+# Requests started per RATE_WINDOW seconds; 0 leaves the rate to Spotify's 429 responses
+RATE_LIMIT = int(os.getenv("SPOTIFY_RATE_LIMIT", "0"))
+RATE_WINDOW = 30.0
+# How often a waiting request re-checks the rate window and whether its call was cancelled
+WAIT_INTERVAL = 0.25
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("spotify_priority", default=NORMAL)
+
+
+class RequestScheduler:
+    def __init__(self, slots: int, reserve: float = INTERACTIVE_RESERVE, rate_limit: int = RATE_LIMIT):
+        """
+        - slots: requests in flight at once.
+        - reserve: share of the slots and of the rate limit kept for INTERACTIVE requests.
+        - rate_limit: requests started per RATE_WINDOW seconds, or 0 for no limit.
+        """
+        self.slots = slots
+        # Other classes always keep at least one slot
+        self.reserved_slots = min(max(round(slots * reserve), 1 if reserve > 0 else 0), slots - 1)
+        self.rate_limit = rate_limit
+        self.shared_rate_limit = int(rate_limit * (1 - reserve))
+        self._active = 0
+        self._started = deque()
+        self._backoff_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self, priority: Optional[int] = None) -> Iterator[None]:
+        """Holds a request slot for the duration of the block, waiting for one in priority order."""
+        self._acquire(current_priority() if priority is None else priority)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def backoff(self, seconds: float):
+        """Holds back non-interactive requests for seconds, e.g. after a 429 response."""
+        with self._condition:
+            self._backoff_until = max(self._backoff_until, time.monotonic() + seconds)
+
+    def wait_for_backoff(self):
+        """Blocks, whatever the priority class, until the current backoff has passed, e.g. to resend a 429ed request."""
+        with self._condition:
+            while (remaining := self._backoff_until - time.monotonic()) > 0:
+                calls.check()
+                self._condition.wait(min(remaining, WAIT_INTERVAL))
+
+    def _acquire(self, priority: int):
+        waiter = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiters, waiter)
+            try:
+                while self._waiters[0] is not waiter or not self._available(priority):
+                    calls.check()
+                    self._condition.wait(WAIT_INTERVAL)
+            except BaseException:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            self._active += 1
+            if self.rate_limit:
+                self._started.append(time.monotonic())
+            # The next waiter may be able to start as well
+            self._condition.notify_all()
+
+    def _available(self, priority: int) -> bool:
+        interactive = priority == INTERACTIVE
+        if self._active >= self.slots - (0 if interactive else self.reserved_slots):
+            return False
+        now = time.monotonic()
+        if not interactive and now < self._backoff_until:
+            return False
+        if self.rate_limit:
+            while self._started and now - self._started[0] >= RATE_WINDOW:
+                self._started.popleft()
+            if len(self._started) >= (self.rate_limit if interactive else self.shared_rate_limit):
+                return False
+        return True
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextlib.contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Runs the block, and the requests it makes, with the given priority class."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
@@ -5,17 +5,19 @@ import logging
 import sys
 from enum import Enum
 import json
-from typing import List, Optional, Tuple
+from typing import List, Literal, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
 import mcp.types as types
 from mcp.server import NotificationOptions, Server  # , stdio_server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 import mcp.server.stdio
 from pydantic import BaseModel, Field, AnyUrl
 from spotipy import SpotifyException
 
-from . import spotify_api
+from . import (calls, encoding, exporter, importer, jobs, pagination, player, ranking, resources, scheduler,
+               spotify_api)
 from .utils import normalize_redirect_uri
 
 
@@ -35,6 +37,11 @@ logger = setup_logger()
 if spotify_api.REDIRECT_URI:
     spotify_api.REDIRECT_URI = normalize_redirect_uri(spotify_api.REDIRECT_URI)
 spotify_client = spotify_api.Client(logger)
+result_pager = pagination.ResultPager()
+resource_hub = resources.ResourceHub(spotify_client)
+job_manager = jobs.JobManager()
+player_poller = player.PlaybackPoller(spotify_client, on_update=resource_hub.flush,
+                                      keep_alive=resource_hub.has_subscriptions)
 
 server = Server("spotify-mcp")
 
@@ -53,8 +60,35 @@ GENRE_CATEGORIES = {
 }
 
 
+# Entries resolved (and tracks added) per step of ImportTracks; matches the playlist add limit
+IMPORT_CHUNK_SIZE = 100
+
+# Default time budget (seconds) of foreground multi-step tools, overridable with SPOTIFY_<TOOL>_DEADLINE
+TOOL_DEADLINES = {
+    tool: float(os.getenv(f"SPOTIFY_{tool.upper()}_DEADLINE", default))
+    for tool, default in (("ArtistDeepDive", 120), ("PlaylistLibrarian", 120), ("Discover", 30))
+}
+# Share of the budget ArtistDeepDive keeps for writing playlists once it stops collecting tracks
+WRITE_RESERVE = 0.25
+
+# Priority class of each tool's Spotify requests (see scheduler.py); other tools are NORMAL
+TOOL_PRIORITIES = {
+    "Playback": scheduler.INTERACTIVE,
+    "Queue": scheduler.INTERACTIVE,
+    "ArtistDeepDive": scheduler.BULK,
+    "PlaylistLibrarian": scheduler.BULK,
+    "ImportTracks": scheduler.BULK,
+    "ExportLibrary": scheduler.BULK,
+}
+
+
 # options =
 class ToolModel(BaseModel):
+    response_format: Optional[Literal[encoding.RESPONSE_FORMATS]] = Field(
+        default=None,
+        description="Output encoding: 'pretty', 'compact' (no whitespace) or " +
+                    "'table' (lists of items as a header row plus value rows). Defaults to the server setting.")
+
     @classmethod
     def as_tool(cls):
         return types.Tool(
@@ -64,6 +98,28 @@ class ToolModel(BaseModel):
         )
 
 
+class PagedToolModel(ToolModel):
+    max_items: Optional[int] = Field(default=None,
+                                     description="Maximum items returned per list in the result; 0 disables the " +
+                                                 "limit. Larger results are truncated and return a page.next_cursor.")
+    max_bytes: Optional[int] = Field(default=None,
+                                     description="Approximate maximum size of the result in bytes; 0 disables the " +
+                                                 "limit. With several queries or items, each entry gets an equal " +
+                                                 "share and its own page.next_cursor.")
+    cursor: Optional[str] = Field(default=None,
+                                  description="page.next_cursor from a previous truncated result, to get the next " +
+                                              "page. No other arguments are needed.")
+
+
+class MultiStepToolModel(ToolModel):
+    background: Optional[bool] = Field(default=False, description="Run as a background job and return a job_id right away.")
+    deadline_seconds: Optional[float] = Field(default=None,
+                                              description="Time budget for the call. When it runs out, the best " +
+                                                          "partial result is returned, marked 'truncated'. " +
+                                                          "Defaults to the server setting for the tool; " +
+                                                          "background jobs have none unless given.")
+
+
 class Playback(ToolModel):
     """Manages the current playback with the following actions:
     - get: Get information about user's current track.
@@ -74,32 +130,45 @@ class Playback(ToolModel):
     action: str = Field(description="Action to perform: 'get', 'start', 'pause' or 'skip'.")
     spotify_uri: Optional[str] = Field(default=None, description="Spotify uri of item to play for 'start' action. " +
                                                                  "If omitted, resumes current playback.")
-    num_skips: Optional[int] = Field(default=1, description="Number of tracks to skip for `skip` action.")
+    num_skips: Optional[int] = Field(default=1, description="Number of tracks to skip for `skip` action. " +
+                                                            f"Within an album or playlist, {spotify_api.JUMP_MIN_SKIPS} " +
+                                                            "or more skips jump straight to the target track.")
 
 
 class Queue(ToolModel):
     """Manage the playback queue - get the queue or add tracks."""
     action: str = Field(description="Action to perform: 'add' or 'get'.")
-    track_id: Optional[str] = Field(default=None, description="Track ID to add to queue (required for add action)")
+    track_id: Optional[str] = Field(default=None, description="Track ID to add to queue (for add action)")
+    track_ids: Optional[List[str]] = Field(default=None, description="Track IDs to add to the queue in order " +
+                                                                      "(for add action, instead of track_id)")
 
 
-class GetInfo(ToolModel):
-    """Get detailed information about a Spotify item (track, album, artist, or playlist)."""
-    item_uri: str = Field(description="URI of the item to get information about. " +
-                                      "If 'playlist' or 'album', returns its tracks. " +
-                                      "If 'artist', returns albums and top tracks.")
+class GetInfo(PagedToolModel):
+    """Get detailed information about Spotify items (track, album, artist, or playlist).
+    Pass item_uri for one item, or item_uris to look up many items in a single call.
+    """
+    item_uri: Optional[str] = Field(default=None, description="URI of the item to get information about. " +
+                                                              "If 'playlist' or 'album', returns its tracks. " +
+                                                              "If 'artist', returns albums and top tracks.")
+    item_uris: Optional[List[str]] = Field(default=None, description="List of item URIs to get information about. " +
+                                                                     "Results are returned in the same order.")
 
 
-class Search(ToolModel):
-    """Search for tracks, albums, artists, or playlists on Spotify."""
-    query: str = Field(description="query term")
+class Search(PagedToolModel):
+    """Search for tracks, albums, artists, or playlists on Spotify.
+    Pass query for one search, or queries to run many searches at once (results keyed by query).
+    """
+    query: Optional[str] = Field(default=None, description="query term")
+    queries: Optional[List[str]] = Field(default=None, description="List of query terms to search in one call")
     qtype: Optional[str] = Field(default="track",
                                  description="Type of items to search for (track, album, artist, playlist, " +
                                              "or comma-separated combination)")
     limit: Optional[int] = Field(default=10, description="Maximum number of items to return")
+    top_hit_only: Optional[bool] = Field(default=False,
+                                         description="For queries, return only the best match per type")
 
 
-class Playlist(ToolModel):
+class Playlist(PagedToolModel):
     """Manage Spotify playlists.
     - get: Get a list of user's playlists.
     - get_tracks: Get tracks in a specific playlist.
@@ -117,7 +186,7 @@ class Playlist(ToolModel):
     public: Optional[bool] = Field(default=True, description="Whether the playlist should be public (for create action).")
 
 
-class ArtistDeepDive(ToolModel):
+class ArtistDeepDive(MultiStepToolModel):
     """Create a comprehensive playlist collection for any artist.
     Generates three playlists:
     - 'Best of [Artist]': Top 20 most popular tracks
@@ -129,7 +198,7 @@ class ArtistDeepDive(ToolModel):
     deep_cuts_max_popularity: Optional[int] = Field(default=40, description="Maximum popularity score (0-100) for deep cuts. Lower = more obscure.")
 
 
-class PlaylistLibrarian(ToolModel):
+class PlaylistLibrarian(MultiStepToolModel):
     """Auto-organize playlists by genre with emoji category prefixes.
     Analyzes tracks in each playlist, detects dominant genres, and optionally
     renames playlists with category prefixes like '🎸 Rock/My Playlist'.
@@ -148,7 +217,7 @@ class MyTopMusic(ToolModel):
     create_playlist: Optional[bool] = Field(default=False, description="Create a playlist from your top tracks")
 
 
-class Discover(ToolModel):
+class Discover(MultiStepToolModel):
     """Get personalized music recommendations based on an artist, track, or your listening history.
     Uses genre-matching and your top artists to find new music you'll like - without deprecated APIs.
     """
@@ -157,6 +226,14 @@ class Discover(ToolModel):
     year_range: Optional[str] = Field(default="2015-2025", description="Year range for recommendations (e.g., '2020-2025')")
     limit: Optional[int] = Field(default=30, description="Number of recommendations to return (max 50)")
     create_playlist: Optional[bool] = Field(default=False, description="Create a playlist from recommendations")
+    popularity_weight: Optional[float] = Field(default=ranking.DEFAULT_POPULARITY_WEIGHT,
+                                               description="Ranking weight for popularity close to the seed")
+    genre_weight: Optional[float] = Field(default=ranking.DEFAULT_GENRE_WEIGHT,
+                                          description="Ranking weight for genre similarity to the seed")
+    recency_weight: Optional[float] = Field(default=ranking.DEFAULT_RECENCY_WEIGHT,
+                                            description="Ranking weight for release year close to the seed")
+    diversity: Optional[float] = Field(default=ranking.DEFAULT_DIVERSITY,
+                                       description="Diversity of the results, from 0 (most relevant) to 1 (most varied)")
 
 
 class Library(ToolModel):
@@ -169,6 +246,62 @@ class Library(ToolModel):
     track_ids: List[str] = Field(description="List of track IDs to save/remove/check.")
 
 
+class ImportTracks(ToolModel):
+    """Create a playlist from a local track list file.
+    Supports CSV (artist/title/ISRC/URI columns), M3U (#EXTINF entries) and plain text
+    with one 'artist - title' per line. Returns a report of entries that could not be matched.
+    """
+    file_path: str = Field(description="Path to the CSV, M3U or text file to import.")
+    playlist_name: str = Field(description="Name of the playlist to create.")
+    description: Optional[str] = Field(default=None, description="Description for the playlist.")
+    public: Optional[bool] = Field(default=False, description="Whether the playlist should be public.")
+
+
+class ExportLibrary(ToolModel):
+    """Export your library to a local NDJSON or CSV file.
+    Streams saved tracks, playlists and playlist contents to disk page by page.
+    An interrupted export resumes from the last completed page when called again with the same arguments.
+    """
+    file_path: str = Field(description="Path of the file to write.")
+    format: Optional[str] = Field(default=None, description="'ndjson' or 'csv'. Defaults from the file extension.")
+    include: Optional[List[str]] = Field(default=None,
+                                         description="Sections to export: 'saved_tracks', 'playlists', " +
+                                                     "'playlist_tracks'. Defaults to all.")
+    resume: Optional[bool] = Field(default=True, description="Resume an interrupted export of the same file.")
+
+
+class JobStatus(ToolModel):
+    """Get the status and progress of a background job, or list all jobs if job_id is omitted."""
+    job_id: Optional[str] = Field(default=None, description="ID returned when the job was started.")
+
+
+class JobResult(ToolModel):
+    """Get the output of a background job: the result once it is done, or the partial output so far."""
+    job_id: str = Field(description="ID returned when the job was started.")
+
+
+class JobCancel(ToolModel):
+    """Cancel a background job. Its partial output shows what it already changed."""
+    job_id: str = Field(description="ID returned when the job was started.")
+
+
+def encode(obj, arguments: dict | None) -> str:
+    """Encodes a tool result in the response_format requested by the call, or the server default."""
+    return encoding.encode_response(obj, (arguments or {}).get("response_format"))
+
+
+def paginate(tool: str, result, arguments: dict | None):
+    """Cuts a large result to the call's output budget (max_items/max_bytes), or the server default."""
+    arguments = arguments or {}
+    return result_pager.first_page(tool, result, arguments.get("max_items"), arguments.get("max_bytes"))
+
+
+def paginate_each(tool: str, entries, arguments: dict | None):
+    """Like paginate, for a result with one entry per query or item; the entries share the budget."""
+    arguments = arguments or {}
+    return result_pager.first_pages(tool, entries, arguments.get("max_items"), arguments.get("max_bytes"))
+
+
 @server.list_prompts()
 async def handle_list_prompts() -> list[types.Prompt]:
     return []
@@ -176,7 +309,34 @@ async def handle_list_prompts() -> list[types.Prompt]:
 
 @server.list_resources()
 async def handle_list_resources() -> list[types.Resource]:
-    return []
+    return resource_hub.list_resources()
+
+
+@server.list_resource_templates()
+async def handle_list_resource_templates() -> list[types.ResourceTemplate]:
+    return resource_hub.list_templates()
+
+
+@server.read_resource()
+async def handle_read_resource(uri: AnyUrl) -> list[ReadResourceContents]:
+    logger.info(f"Reading resource: {uri}")
+    player_poller.touch()
+    # A missing or expired entry is fetched from Spotify; keep that off the event loop
+    content = await asyncio.to_thread(resource_hub.read, str(uri))
+    await resource_hub.flush()
+    return [ReadResourceContents(content=content, mime_type=resources.RESOURCE_MIME_TYPE)]
+
+
+@server.subscribe_resource()
+async def handle_subscribe_resource(uri: AnyUrl) -> None:
+    logger.info(f"Subscribing to resource: {uri}")
+    resource_hub.subscribe(str(uri), server.request_context.session)
+
+
+@server.unsubscribe_resource()
+async def handle_unsubscribe_resource(uri: AnyUrl) -> None:
+    logger.info(f"Unsubscribing from resource: {uri}")
+    resource_hub.unsubscribe(str(uri))
 
 
 @server.list_tools()
@@ -194,6 +354,11 @@ async def handle_list_tools() -> list[types.Tool]:
         PlaylistLibrarian.as_tool(),
         MyTopMusic.as_tool(),
         Discover.as_tool(),
+        ImportTracks.as_tool(),
+        ExportLibrary.as_tool(),
+        JobStatus.as_tool(),
+        JobResult.as_tool(),
+        JobCancel.as_tool(),
     ]
     logger.info(f"Available tools: {[tool.name for tool in tools]}")
     return tools
@@ -204,9 +369,35 @@ async def handle_call_tool(
         name: str, arguments: dict | None
 ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     """Handle tool execution requests."""
+    player_poller.touch()
+    try:
+        with scheduler.priority(TOOL_PRIORITIES.get(name[7:], scheduler.NORMAL)):
+            return await call_tool(name, arguments)
+    finally:
+        if name == "SpotifyPlayback" and (arguments or {}).get("action") != "get":
+            # Pick up the new player state right away instead of at the next interval
+            player_poller.wake()
+        # Tool calls refresh and invalidate cached data; tell resource subscribers
+        await resource_hub.flush()
+
+
+async def call_tool(
+        name: str, arguments: dict | None
+) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     logger.info(f"Tool called: {name} with arguments: {arguments}")
     assert name[:7] == "Spotify", f"Unknown tool: {name}"
     try:
+        # Checked before any work, so a bad format cannot fail a call after it changed something
+        if arguments and arguments.get("response_format") is not None:
+            try:
+                encoding.check_format(arguments["response_format"])
+            except ValueError as e:
+                return [types.TextContent(type="text", text=str(e))]
+        if arguments and arguments.get("cursor"):
+            page = result_pager.next_page(name, arguments["cursor"],
+                                          arguments.get("max_items"), arguments.get("max_bytes"))
+            return [types.TextContent(type="text", text=encode(page, arguments))]
+
         match name[7:]:
             case "Playback":
                 action = arguments.get("action")
@@ -218,7 +409,7 @@ async def handle_call_tool(
                             logger.info(f"Current track retrieved: {curr_track.get('name', 'Unknown')}")
                             return [types.TextContent(
                                 type="text",
-                                text=json.dumps(curr_track, indent=2)
+                                text=encode(curr_track, arguments)
                             )]
                         logger.info("No track currently playing")
                         return [types.TextContent(
@@ -247,20 +438,37 @@ async def handle_call_tool(
                         spotify_client.skip_track(n=num_skips)
                         return [types.TextContent(
                             type="text",
-                            text="Skipped to next track."
+                            text="Skipped to next track." if num_skips == 1 else f"Skipped {num_skips} tracks."
                         )]
 
             case "Search":
                 logger.info(f"Performing search with arguments: {arguments}")
-                search_results = spotify_client.search(
-                    query=arguments.get("query", ""),
-                    qtype=arguments.get("qtype", "track"),
-                    limit=arguments.get("limit", 10)
-                )
+                queries = arguments.get("queries")
+                if isinstance(queries, str):
+                    try:
+                        queries = json.loads(queries)
+                    except json.JSONDecodeError:
+                        return [types.TextContent(
+                            type="text",
+                            text="Error: queries must be a list or a valid JSON array."
+                        )]
+                if queries:
+                    search_results = paginate_each(name, spotify_client.search_many(
+                        queries=queries,
+                        qtype=arguments.get("qtype", "track"),
+                        limit=arguments.get("limit", 10),
+                        top_hit_only=arguments.get("top_hit_only", False)
+                    ), arguments)
+                else:
+                    search_results = paginate(name, spotify_client.search(
+                        query=arguments.get("query", ""),
+                        qtype=arguments.get("qtype", "track"),
+                        limit=arguments.get("limit", 10)
+                    ), arguments)
                 logger.info("Search completed successfully.")
                 return [types.TextContent(
                     type="text",
-                    text=json.dumps(search_results, indent=2)
+                    text=encode(search_results, arguments)
                 )]
 
             case "Queue":
@@ -270,11 +478,26 @@ async def handle_call_tool(
                 match action:
                     case "add":
                         track_id = arguments.get("track_id")
-                        if not track_id:
+                        track_ids = arguments.get("track_ids")
+                        if isinstance(track_ids, str):
+                            try:
+                                track_ids = json.loads(track_ids)
+                            except json.JSONDecodeError:
+                                return [types.TextContent(
+                                    type="text",
+                                    text="Error: track_ids must be a list of track IDs."
+                                )]
+                        if not track_id and not track_ids:
                             logger.error("track_id is required for add to queue.")
                             return [types.TextContent(
                                 type="text",
-                                text="track_id is required for add action"
+                                text="track_id or track_ids is required for add action"
+                            )]
+                        if track_ids:
+                            result = spotify_client.add_many_to_queue(track_ids)
+                            return [types.TextContent(
+                                type="text",
+                                text=encode(result, arguments)
                             )]
                         spotify_client.add_to_queue(track_id)
                         return [types.TextContent(
@@ -286,7 +509,7 @@ async def handle_call_tool(
                         queue = spotify_client.get_queue()
                         return [types.TextContent(
                             type="text",
-                            text=json.dumps(queue, indent=2)
+                            text=encode(queue, arguments)
                         )]
 
                     case _:
@@ -297,12 +520,29 @@ async def handle_call_tool(
 
             case "GetInfo":
                 logger.info(f"Getting item info with arguments: {arguments}")
-                item_info = spotify_client.get_info(
-                    item_uri=arguments.get("item_uri")
-                )
+                item_uris = arguments.get("item_uris")
+                if isinstance(item_uris, str):
+                    try:
+                        item_uris = json.loads(item_uris)
+                    except json.JSONDecodeError:
+                        return [types.TextContent(
+                            type="text",
+                            text="Error: item_uris must be a list or a valid JSON array."
+                        )]
+                if item_uris:
+                    item_info = paginate_each(name, spotify_client.get_infos(item_uris), arguments)
+                elif arguments.get("item_uri"):
+                    item_info = paginate(name, spotify_client.get_info(
+                        item_uri=arguments.get("item_uri")
+                    ), arguments)
+                else:
+                    return [types.TextContent(
+                        type="text",
+                        text="Error: item_uri or item_uris is required."
+                    )]
                 return [types.TextContent(
                     type="text",
-                    text=json.dumps(item_info, indent=2)
+                    text=encode(item_info, arguments)
                 )]
 
             case "Playlist":
@@ -314,7 +554,7 @@ async def handle_call_tool(
                         playlists = spotify_client.get_current_user_playlists()
                         return [types.TextContent(
                             type="text",
-                            text=json.dumps(playlists, indent=2)
+                            text=encode(paginate(name, playlists, arguments), arguments)
                         )]
                     case "get_tracks":
                         logger.info(f"Getting tracks in playlist with arguments: {arguments}")
@@ -327,7 +567,7 @@ async def handle_call_tool(
                         tracks = spotify_client.get_playlist_tracks(arguments.get("playlist_id"))
                         return [types.TextContent(
                             type="text",
-                            text=json.dumps(tracks, indent=2)
+                            text=encode(paginate(name, tracks, arguments), arguments)
                         )]
                     case "add_tracks":
                         logger.info(f"Adding tracks to playlist with arguments: {arguments}")
@@ -342,13 +582,13 @@ async def handle_call_tool(
                                     text="Error: track_ids must be a list or a valid JSON array."
                                 )]
 
-                        spotify_client.add_tracks_to_playlist(
+                        added = spotify_client.add_tracks_to_playlist(
                             playlist_id=arguments.get("playlist_id"),
                             track_ids=track_ids
                         )
                         return [types.TextContent(
                             type="text",
-                            text="Tracks added to playlist."
+                            text="Tracks added to playlist." if added else "Error: tracks could not be added to playlist."
                         )]
                     case "remove_tracks":
                         logger.info(f"Removing tracks from playlist with arguments: {arguments}")
@@ -413,7 +653,7 @@ async def handle_call_tool(
                         )
                         return [types.TextContent(
                             type="text",
-                            text=json.dumps(playlist, indent=2)
+                            text=encode(playlist, arguments)
                         )]
 
                     case _:
@@ -461,7 +701,7 @@ async def handle_call_tool(
                         check_results = [{"track_id": tid, "is_saved": saved} for tid, saved in zip(track_ids, results)]
                         return [types.TextContent(
                             type="text",
-                            text=json.dumps(check_results, indent=2)
+                            text=encode(check_results, arguments)
                         )]
                     case _:
                         return [types.TextContent(
@@ -469,204 +709,27 @@ async def handle_call_tool(
                             text=f"Unknown library action: {action}. Supported actions are: save, remove, check."
                         )]
 
-            case "ArtistDeepDive":
-                logger.info(f"ArtistDeepDive called with arguments: {arguments}")
-                artist_name = arguments.get("artist_name")
-                include_singles = arguments.get("include_singles", True)
-                deep_cuts_threshold = arguments.get("deep_cuts_max_popularity", 40)
-
-                # 1. Search for artist
-                search_results = spotify_client.search(artist_name, qtype="artist", limit=1)
-                if not search_results.get('artists'):
-                    return [types.TextContent(type="text", text=f"Artist '{artist_name}' not found.")]
-
-                artist = search_results['artists'][0]
-                artist_id = artist['id']
-                artist_display_name = artist['name']
-                logger.info(f"Found artist: {artist_display_name} (ID: {artist_id})")
-
-                # 2. Get all albums
-                albums = spotify_client.get_artist_albums(artist_id, include_singles=include_singles)
-                logger.info(f"Found {len(albums)} albums/singles for {artist_display_name}")
-
-                # 3. Collect all tracks with metadata
-                all_tracks = []
-                for album in albums:
-                    try:
-                        tracks, release_date, album_type = spotify_client.get_album_tracks_full(album['id'])
-                        for track in tracks:
-                            full_track = spotify_client.get_track(track['id'])
-                            all_tracks.append({
-                                'id': track['id'],
-                                'name': track['name'],
-                                'popularity': full_track.get('popularity', 0),
-                                'release_date': release_date,
-                                'album_type': album_type,
-                                'album_name': album['name']
-                            })
-                    except Exception as e:
-                        logger.error(f"Error processing album {album.get('name')}: {str(e)}")
-                        continue
-
-                logger.info(f"Collected {len(all_tracks)} total tracks")
-
-                # 4. Deduplicate by track name (keep highest popularity version)
-                seen = {}
-                for track in all_tracks:
-                    key = track['name'].lower()
-                    if key not in seen or track['popularity'] > seen[key]['popularity']:
-                        seen[key] = track
-                unique_tracks = list(seen.values())
-                logger.info(f"After deduplication: {len(unique_tracks)} unique tracks")
-
-                # 5. Create "Best of" playlist
-                best_of_tracks = sorted(unique_tracks, key=lambda x: x['popularity'], reverse=True)[:20]
-                best_of_ids = set(t['id'] for t in best_of_tracks)
-                best_of_playlist = spotify_client.create_playlist(
-                    name=f"Best of {artist_display_name}",
-                    description=f"Top 20 most popular tracks by {artist_display_name}"
-                )
-                if best_of_tracks:
-                    spotify_client.add_tracks_to_playlist(best_of_playlist['id'], [t['id'] for t in best_of_tracks])
-
-                # 6. Create "Deep Cuts" playlist
-                deep_cuts = [t for t in unique_tracks
-                             if t['popularity'] < deep_cuts_threshold
-                             and t['id'] not in best_of_ids
-                             and t['album_type'] == 'album']
-                deep_cuts = sorted(deep_cuts, key=lambda x: x['popularity'])[:25]
-                deep_cuts_playlist = spotify_client.create_playlist(
-                    name=f"{artist_display_name}: Deep Cuts",
-                    description=f"Hidden gems and lesser-known tracks by {artist_display_name}"
-                )
-                if deep_cuts:
-                    spotify_client.add_tracks_to_playlist(deep_cuts_playlist['id'], [t['id'] for t in deep_cuts])
-
-                # 7. Create "Through the Years" playlist
-                chronological = sorted(unique_tracks, key=lambda x: x['release_date'])
-                chrono_playlist = spotify_client.create_playlist(
-                    name=f"{artist_display_name}: Through the Years",
-                    description=f"Complete discography of {artist_display_name} in chronological order"
-                )
-                if chronological:
-                    track_ids = [t['id'] for t in chronological]
-                    for i in range(0, len(track_ids), 100):
-                        spotify_client.add_tracks_to_playlist(chrono_playlist['id'], track_ids[i:i+100])
-
-                result = {
-                    "artist": {"name": artist_display_name, "id": artist_id},
-                    "playlists_created": [
-                        {"name": best_of_playlist['name'], "id": best_of_playlist['id'], "track_count": len(best_of_tracks)},
-                        {"name": deep_cuts_playlist['name'], "id": deep_cuts_playlist['id'], "track_count": len(deep_cuts)},
-                        {"name": chrono_playlist['name'], "id": chrono_playlist['id'], "track_count": len(chronological)}
-                    ],
-                    "stats": {
-                        "total_albums_analyzed": len(albums),
-                        "total_tracks_analyzed": len(unique_tracks)
-                    }
-                }
-                return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
-
-            case "PlaylistLibrarian":
-                logger.info(f"PlaylistLibrarian called with arguments: {arguments}")
-                dry_run = arguments.get("dry_run", True)
-                style = arguments.get("category_style", "emoji")
-
-                # 1. Get all user-owned playlists
-                all_playlists = spotify_client.get_all_playlists()
-                user_id = spotify_client.sp.current_user()['id']
-                owned = [p for p in all_playlists if p['owner']['id'] == user_id]
-                logger.info(f"Found {len(owned)} user-owned playlists")
-
-                changes = []
-                category_counts = {cat: 0 for cat in GENRE_CATEGORIES}
-                skipped = 0
-
-                for playlist in owned:
-                    name = playlist['name']
-
-                    # Skip if already categorized
-                    if any(name.startswith(cat) for cat in GENRE_CATEGORIES):
-                        skipped += 1
-                        continue
-
-                    # 2. Sample tracks from playlist
-                    try:
-                        tracks = spotify_client.get_playlist_tracks(playlist['id'])[:30]
-                    except Exception as e:
-                        logger.error(f"Error getting tracks for playlist '{name}': {str(e)}")
-                        skipped += 1
-                        continue
-
-                    if not tracks:
-                        skipped += 1
-                        continue
-
-                    track_ids = [t['id'] for t in tracks if t and t.get('id')]
-                    if not track_ids:
-                        skipped += 1
-                        continue
-
-                    # 3. Get artists and their genres
-                    try:
-                        artist_ids = spotify_client.get_artists_for_tracks(track_ids)
-                        if not artist_ids:
-                            skipped += 1
-                            continue
-
-                        artist_genres = spotify_client.get_artists_genres(artist_ids)
-                    except Exception as e:
-                        logger.error(f"Error getting genres for playlist '{name}': {str(e)}")
-                        skipped += 1
-                        continue
-
-                    # 4. Score genres
-                    all_genres = []
-                    for genres in artist_genres.values():
-                        all_genres.extend(genres)
-
-                    best_category = None
-                    best_score = 0
-                    for category, keywords in GENRE_CATEGORIES.items():
-                        score = sum(1 for g in all_genres if any(kw in g.lower() for kw in keywords))
-                        if score > best_score:
-                            best_score = score
-                            best_category = category
-
-                    if best_category and best_score > 0:
-                        if style == "emoji":
-                            new_name = f"{best_category}/{name}"
-                        else:
-                            text_cat = best_category.split()[1]
-                            new_name = f"[{text_cat}] {name}"
-
-                        changes.append({
-                            "playlist_id": playlist['id'],
-                            "original_name": name,
-                            "new_name": new_name,
-                            "detected_category": best_category,
-                            "applied": not dry_run
-                        })
-                        category_counts[best_category] += 1
-
-                        if not dry_run:
-                            try:
-                                spotify_client.change_playlist_details(playlist['id'], name=new_name)
-                            except Exception as e:
-                                logger.error(f"Error renaming playlist '{name}': {str(e)}")
-                                changes[-1]["applied"] = False
-                    else:
-                        skipped += 1
-
-                result = {
-                    "playlists_analyzed": len(owned),
-                    "playlists_categorized": len(changes),
-                    "playlists_skipped": skipped,
-                    "dry_run": dry_run,
-                    "changes": changes,
-                    "category_summary": {k: v for k, v in category_counts.items() if v > 0}
-                }
-                return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
+            case "ArtistDeepDive" | "PlaylistLibrarian" | "Discover":
+                logger.info(f"{name[7:]} called with arguments: {arguments}")
+                work = MULTI_STEP_TOOLS[name[7:]]
+                deadline = arguments.get("deadline_seconds")
+                if arguments.get("background"):
+                    job = job_manager.submit(name, arguments, lambda: work(arguments), timeout=deadline)
+                    return [types.TextContent(type="text", text=encode({
+                        "job_id": job['id'],
+                        "status": job['status'],
+                        "hint": "Poll with SpotifyJobStatus and fetch the output with SpotifyJobResult."
+                    }, arguments))]
+                deadline = deadline or TOOL_DEADLINES[name[7:]]
+                try:
+                    result = await run_with_progress(name, work, arguments, deadline)
+                except ValueError as e:
+                    return [types.TextContent(type="text", text=str(e))]
+                except calls.DeadlineExceeded:
+                    return [types.TextContent(type="text", text=f"{name[7:]} ran out of time ({deadline:g}s) " +
+                                                                "before it had a result. Retry with a larger " +
+                                                                "deadline_seconds or background=true.")]
+                return [types.TextContent(type="text", text=encode(result, arguments))]
 
             case "MyTopMusic":
                 logger.info(f"MyTopMusic called with arguments: {arguments}")
@@ -743,11 +806,11 @@ async def handle_call_tool(
                         description=f"Your top tracks for {period_labels[time_range]}"
                     )
                     track_ids = [t['id'] for t in top_tracks[:top_count]]
-                    spotify_client.add_tracks_to_playlist(playlist['id'], track_ids)
+                    added = spotify_client.add_tracks_to_playlist(playlist['id'], track_ids)
                     recap_playlist = {
                         "name": playlist['name'],
                         "id": playlist['id'],
-                        "track_count": len(track_ids)
+                        "track_count": len(track_ids) if added else 0
                     }
 
                 result = {
@@ -761,191 +824,67 @@ async def handle_call_tool(
                 if recap_playlist:
                     result["recap_playlist"] = recap_playlist
 
-                return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
-
-            case "Discover":
-                logger.info(f"Discover called with arguments: {arguments}")
-                seed_type = arguments.get("seed_type")
-                seed_value = arguments.get("seed_value")
-                year_range = arguments.get("year_range", "2015-2025")
-                limit = min(arguments.get("limit", 30), 50)
-                create_playlist_flag = arguments.get("create_playlist", False)
-
-                # Validate inputs
-                if seed_type not in ["artist", "track", "listening_history"]:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"Invalid seed_type: {seed_type}. Must be 'artist', 'track', or 'listening_history'."
-                    )]
+                return [types.TextContent(type="text", text=encode(result, arguments))]
 
-                if seed_type in ["artist", "track"] and not seed_value:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"seed_value is required for seed_type '{seed_type}'."
-                    )]
+            case "ImportTracks":
+                logger.info(f"ImportTracks called with arguments: {arguments}")
+                file_path = arguments.get("file_path")
+                if not file_path or not os.path.isfile(file_path):
+                    return [types.TextContent(type="text", text=f"File not found: {file_path}")]
 
-                # Step 1: Get seed genres
-                seed_genres = []
-                seed_artist_name = None
-                seed_popularity = 50  # Default middle-range
-
-                if seed_type == "artist":
-                    # Search for the artist
-                    search_results = spotify_client.search(seed_value, qtype="artist", limit=1)
-                    if not search_results.get('artists'):
-                        return [types.TextContent(type="text", text=f"Artist '{seed_value}' not found.")]
-                    artist = search_results['artists'][0]
-                    artist_details = spotify_client.get_artist(artist['id'])
-                    seed_genres = artist_details.get('genres', [])[:3]
-                    seed_artist_name = artist['name']
-                    logger.info(f"Seed artist: {seed_artist_name}, genres: {seed_genres}")
-
-                elif seed_type == "track":
-                    # Get track and its primary artist's genres
-                    track_id = seed_value.split(':')[-1] if ':' in seed_value else seed_value
-                    track = spotify_client.get_track(track_id)
-                    seed_popularity = track.get('popularity', 50)
-                    if track.get('artists'):
-                        artist_id = track['artists'][0]['id']
-                        artist_details = spotify_client.get_artist(artist_id)
-                        seed_genres = artist_details.get('genres', [])[:3]
-                        seed_artist_name = artist_details['name']
-                    logger.info(f"Seed track by {seed_artist_name}, popularity: {seed_popularity}, genres: {seed_genres}")
-
-                elif seed_type == "listening_history":
-                    # Get genres from user's top artists
-                    top_artists = spotify_client.get_top_artists(time_range="medium_term", limit=10)
-                    genre_counts = {}
-                    for artist in top_artists:
-                        for genre in artist.get('genres', []):
-                            genre_counts[genre] = genre_counts.get(genre, 0) + 1
-                    # Get top 3 genres
-                    seed_genres = sorted(genre_counts.keys(), key=lambda g: -genre_counts[g])[:3]
-                    logger.info(f"Seed genres from listening history: {seed_genres}")
-
-                if not seed_genres:
-                    return [types.TextContent(
-                        type="text",
-                        text="Could not determine genres for recommendations. Try a different seed."
-                    )]
+                result = await run_with_progress(name, import_tracks, arguments)
+                logger.info(f"Imported {result['matched']}/{result['total_entries']} entries from {file_path}")
+                return [types.TextContent(type="text", text=encode(result, arguments))]
 
-                # Step 2: Get tracks to exclude (recent + saved)
-                exclude_ids = set()
+            case "ExportLibrary":
+                logger.info(f"ExportLibrary called with arguments: {arguments}")
+                if not arguments.get("file_path"):
+                    return [types.TextContent(type="text", text="file_path is required.")]
                 try:
-                    exclude_ids.update(spotify_client.get_recent_track_ids(limit=50))
-                    exclude_ids.update(spotify_client.get_user_saved_track_ids(limit=100))
-                except Exception as e:
-                    logger.error(f"Error getting tracks to exclude: {str(e)}")
-
-                # Step 3: Search for tracks by genre
-                recommendations = []
-                seen_track_ids = set()
-                artist_track_counts = {}  # Track how many songs per artist
-
-                for genre in seed_genres:
-                    try:
-                        tracks = spotify_client.search_by_genre(genre, year_range=year_range, limit=20)
-                        for track in tracks:
-                            track_id = track['id']
-                            if track_id in seen_track_ids or track_id in exclude_ids:
-                                continue
-
-                            # Limit tracks per artist for diversity
-                            artist_id = track['artists'][0]['id'] if track.get('artists') else None
-                            if artist_id and artist_track_counts.get(artist_id, 0) >= 3:
-                                continue
-
-                            seen_track_ids.add(track_id)
-                            if artist_id:
-                                artist_track_counts[artist_id] = artist_track_counts.get(artist_id, 0) + 1
-
-                            recommendations.append({
-                                'id': track_id,
-                                'name': track['name'],
-                                'artist': track['artists'][0]['name'] if track.get('artists') else 'Unknown',
-                                'artist_id': artist_id,
-                                'popularity': track.get('popularity', 0),
-                                'source_genre': genre
-                            })
-                    except Exception as e:
-                        logger.error(f"Error searching genre '{genre}': {str(e)}")
-                        continue
-
-                # Step 4: Add top tracks from user's similar artists
-                if seed_type in ["artist", "track"]:
-                    try:
-                        top_artists = spotify_client.get_top_artists(time_range="medium_term", limit=20)
-                        matching_artists = []
-                        for artist in top_artists:
-                            artist_genres = set(artist.get('genres', []))
-                            if artist_genres.intersection(seed_genres):
-                                matching_artists.append(artist)
-
-                        for artist in matching_artists[:5]:
-                            try:
-                                top_tracks = spotify_client.get_artist_top_tracks(artist['id'])
-                                for track in top_tracks[:3]:
-                                    track_id = track['id']
-                                    if track_id in seen_track_ids or track_id in exclude_ids:
-                                        continue
-                                    seen_track_ids.add(track_id)
-                                    recommendations.append({
-                                        'id': track_id,
-                                        'name': track['name'],
-                                        'artist': artist['name'],
-                                        'artist_id': artist['id'],
-                                        'popularity': track.get('popularity', 0),
-                                        'source_genre': 'top_artist_match'
-                                    })
-                            except Exception as e:
-                                logger.error(f"Error getting top tracks for {artist['name']}: {str(e)}")
-                                continue
-                    except Exception as e:
-                        logger.error(f"Error getting matching top artists: {str(e)}")
-
-                # Step 5: Sort by popularity proximity to seed and diversify
-                def score_track(t):
-                    pop_diff = abs(t['popularity'] - seed_popularity)
-                    return pop_diff
-
-                recommendations.sort(key=score_track)
-                recommendations = recommendations[:limit]
-
-                logger.info(f"Generated {len(recommendations)} recommendations")
-
-                # Step 6: Optional playlist creation
-                discover_playlist = None
-                if create_playlist_flag and recommendations:
-                    playlist_name = f"Discover: {seed_artist_name or 'My Genres'}"
-                    playlist = spotify_client.create_playlist(
-                        name=playlist_name,
-                        description=f"Recommendations based on {seed_type}: {seed_value or 'listening history'}"
+                    library_exporter = exporter.LibraryExporter(
+                        spotify_client,
+                        arguments.get("file_path"),
+                        fmt=arguments.get("format"),
+                        include=arguments.get("include")
                     )
-                    track_ids = [t['id'] for t in recommendations]
-                    spotify_client.add_tracks_to_playlist(playlist['id'], track_ids)
-                    discover_playlist = {
-                        "name": playlist['name'],
-                        "id": playlist['id'],
-                        "track_count": len(track_ids)
-                    }
-
-                result = {
-                    "seed_type": seed_type,
-                    "seed_value": seed_value or "listening_history",
-                    "seed_genres": seed_genres,
-                    "year_range": year_range,
-                    "recommendations": [{
-                        "name": t['name'],
-                        "artist": t['artist'],
-                        "id": t['id'],
-                        "popularity": t['popularity']
-                    } for t in recommendations],
-                    "count": len(recommendations)
-                }
-                if discover_playlist:
-                    result["playlist_created"] = discover_playlist
-
-                return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
+                except ValueError as e:
+                    return [types.TextContent(type="text", text=str(e))]
+                result = await run_with_progress(
+                    name, lambda args: library_exporter.run(resume=args.get("resume", True)), arguments)
+                logger.info(f"Exported {result['records_written']} records to {result['file']}")
+                return [types.TextContent(type="text", text=encode(result, arguments))]
+
+            case "JobStatus":
+                job_id = arguments.get("job_id")
+                if not job_id:
+                    return [types.TextContent(type="text", text=encode(job_manager.list(), arguments))]
+                job = job_manager.get(job_id)
+                if not job:
+                    return [types.TextContent(type="text", text=f"Unknown job: {job_id}")]
+                status = {k: job[k] for k in ('id', 'tool', 'status', 'created_at', 'updated_at', 'progress', 'error')}
+                return [types.TextContent(type="text", text=encode(status, arguments))]
+
+            case "JobResult":
+                job = job_manager.get(arguments.get("job_id"))
+                if not job:
+                    return [types.TextContent(type="text", text=f"Unknown job: {arguments.get('job_id')}")]
+                output = {"job_id": job['id'], "status": job['status']}
+                if job['status'] == "done":
+                    output["result"] = job['result']
+                else:
+                    output["partial"] = job['partial']
+                    output["error"] = job['error']
+                return [types.TextContent(type="text", text=encode(output, arguments))]
+
+            case "JobCancel":
+                job = job_manager.cancel(arguments.get("job_id"))
+                if not job:
+                    return [types.TextContent(type="text", text=f"Unknown job: {arguments.get('job_id')}")]
+                return [types.TextContent(type="text", text=encode({
+                    "job_id": job['id'],
+                    "status": job['status'],
+                    "partial": job['partial']
+                }, arguments))]
 
             case _:
                 error_msg = f"Unknown tool: {name}"
@@ -954,6 +893,11 @@ async def handle_call_tool(
                     type="text",
                     text=error_msg
                 )]
+    except pagination.CursorError as ce:
+        return [types.TextContent(
+            type="text",
+            text=str(ce)
+        )]
     except SpotifyException as se:
         error_msg = f"Spotify Client error occurred: {str(se)}"
         logger.error(error_msg)
@@ -970,14 +914,571 @@ async def handle_call_tool(
         )]
 
 
+def artist_deep_dive(arguments: dict) -> dict:
+    """Builds the ArtistDeepDive playlists. Runs synchronously, in a job or off the event loop."""
+    artist_name = arguments.get("artist_name")
+    include_singles = arguments.get("include_singles", True)
+    deep_cuts_threshold = arguments.get("deep_cuts_max_popularity", 40)
+
+    # 1. Resolve artist
+    artist = spotify_client.resolve_artist(artist_name)
+    if not artist:
+        raise ValueError(f"Artist '{artist_name}' not found.")
+
+    artist_id = artist['id']
+    artist_display_name = artist['name']
+    logger.info(f"Found artist: {artist_display_name} (ID: {artist_id})")
+
+    # 2. Get all albums
+    albums = spotify_client.get_artist_albums(artist_id, include_singles=include_singles,
+                                              narrow=lambda album: {'id': album['id'], 'name': album['name']})
+    logger.info(f"Found {len(albums)} albums/singles for {artist_display_name}")
+    # Checkpoints: one per album, then one per playlist
+    total_steps = len(albums) + 3
+    calls.progress(0, total_steps, "Fetching albums")
+
+    # 3. Collect all tracks with metadata, leaving part of the time budget for writing the playlists
+    all_tracks = []
+    albums_analyzed = 0
+    truncated = False
+    for done, album in enumerate(albums, start=1):
+        if calls.expired(reserve=WRITE_RESERVE):
+            truncated = True
+            break
+        albums_analyzed = done
+        try:
+            tracks, release_date, album_type = spotify_client.get_album_tracks_full(album['id'])
+            for track in tracks:
+                full_track = spotify_client.get_track(track['id'])
+                all_tracks.append({
+                    'id': track['id'],
+                    'name': track['name'],
+                    'popularity': full_track.get('popularity', 0),
+                    'release_date': release_date,
+                    'album_type': album_type,
+                    'album_name': album['name']
+                })
+        except Exception as e:
+            logger.error(f"Error processing album {album.get('name')}: {str(e)}")
+        calls.progress(done, total_steps, f"Fetched {done} of {len(albums)} albums")
+
+    logger.info(f"Collected {len(all_tracks)} total tracks")
+
+    # 4. Deduplicate by track name (keep highest popularity version)
+    seen = {}
+    for track in all_tracks:
+        key = track['name'].lower()
+        if key not in seen or track['popularity'] > seen[key]['popularity']:
+            seen[key] = track
+    unique_tracks = list(seen.values())
+    logger.info(f"After deduplication: {len(unique_tracks)} unique tracks")
+
+    playlists_created = []
+
+    def create_filled_playlist(name, description, track_ids):
+        # Recorded as soon as it exists, and updated per chunk, so a cancelled run reports exactly what was written
+        playlist = spotify_client.create_playlist(name=name, description=description)
+        created = {"name": playlist['name'], "id": playlist['id'], "track_count": 0}
+        playlists_created.append(created)
+        calls.partial("playlists_created", list(playlists_created))
+        step = len(albums) + len(playlists_created) - 1
+        for i in range(0, len(track_ids), 100):
+            chunk = track_ids[i:i+100]
+            if spotify_client.add_tracks_to_playlist(playlist['id'], chunk):
+                created['track_count'] += len(chunk)
+                calls.partial("playlists_created", list(playlists_created))
+            calls.progress(step + min(i + 100, len(track_ids)) / len(track_ids) * 0.9, total_steps,
+                           f"Added {created['track_count']} of {len(track_ids)} tracks to '{name}'")
+        calls.progress(step + 1, total_steps, f"Created '{name}'")
+
+    try:
+        # 5. Create "Best of" playlist
+        best_of_tracks = sorted(unique_tracks, key=lambda x: x['popularity'], reverse=True)[:20]
+        best_of_ids = set(t['id'] for t in best_of_tracks)
+        create_filled_playlist(f"Best of {artist_display_name}",
+                               f"Top 20 most popular tracks by {artist_display_name}",
+                               [t['id'] for t in best_of_tracks])
+
+        # 6. Create "Deep Cuts" playlist
+        deep_cuts = [t for t in unique_tracks
+                     if t['popularity'] < deep_cuts_threshold
+                     and t['id'] not in best_of_ids
+                     and t['album_type'] == 'album']
+        deep_cuts = sorted(deep_cuts, key=lambda x: x['popularity'])[:25]
+        create_filled_playlist(f"{artist_display_name}: Deep Cuts",
+                               f"Hidden gems and lesser-known tracks by {artist_display_name}",
+                               [t['id'] for t in deep_cuts])
+
+        # 7. Create "Through the Years" playlist
+        chronological = sorted(unique_tracks, key=lambda x: x['release_date'])
+        create_filled_playlist(f"{artist_display_name}: Through the Years",
+                               f"Complete discography of {artist_display_name} in chronological order",
+                               [t['id'] for t in chronological])
+    except calls.DeadlineExceeded:
+        truncated = True
+
+    result = {
+        "artist": {"name": artist_display_name, "id": artist_id},
+        "playlists_created": playlists_created,
+        "stats": {
+            "total_albums_analyzed": albums_analyzed,
+            "total_tracks_analyzed": len(unique_tracks)
+        }
+    }
+    if truncated:
+        result["truncated"] = True
+        result["stats"]["total_albums_found"] = len(albums)
+    return result
+
+
+def playlist_librarian(arguments: dict) -> dict:
+    """Classifies (and optionally renames) the user's playlists. Runs synchronously, in a job or off the event loop."""
+    dry_run = arguments.get("dry_run", True)
+    style = arguments.get("category_style", "emoji")
+
+    # 1. Get all user-owned playlists
+    all_playlists = spotify_client.get_all_playlists()
+    user_id = spotify_client.sp.current_user()['id']
+    owned = [p for p in all_playlists if p['owner']['id'] == user_id]
+    logger.info(f"Found {len(owned)} user-owned playlists")
+
+    changes = []
+    category_counts = {cat: 0 for cat in GENRE_CATEGORIES}
+    skipped = 0
+
+    analyzed = 0
+    truncated = False
+    try:
+        for done, playlist in enumerate(owned):
+            analyzed = done
+            calls.progress(done, len(owned), f"Classified {done} of {len(owned)} playlists")
+            name = playlist['name']
+
+            # Skip if already categorized
+            if any(name.startswith(cat) for cat in GENRE_CATEGORIES):
+                skipped += 1
+                continue
+
+            # 2. Sample tracks from playlist, with just their IDs and artist IDs
+            try:
+                page = spotify_client.get_playlist_items_page(playlist['id'], limit=30, projection='artists')
+            except Exception as e:
+                logger.error(f"Error getting tracks for playlist '{name}': {str(e)}")
+                skipped += 1
+                continue
+
+            tracks = [item['track'] for item in page.get('items', []) if item and item.get('track')]
+            tracks = [t for t in tracks if t.get('id')]  # local files have no ID
+            if not tracks:
+                skipped += 1
+                continue
+
+            # 3. Get artists and their genres
+            try:
+                artist_ids = list({t['artists'][0]['id'] for t in tracks
+                                   if t.get('artists') and t['artists'][0]['id']})
+                if not artist_ids:
+                    skipped += 1
+                    continue
+
+                artist_genres = spotify_client.get_artists_genres(artist_ids)
+            except Exception as e:
+                logger.error(f"Error getting genres for playlist '{name}': {str(e)}")
+                skipped += 1
+                continue
+
+            # 4. Score genres
+            all_genres = []
+            for genres in artist_genres.values():
+                all_genres.extend(genres)
+
+            best_category = None
+            best_score = 0
+            for category, keywords in GENRE_CATEGORIES.items():
+                score = sum(1 for g in all_genres if any(kw in g.lower() for kw in keywords))
+                if score > best_score:
+                    best_score = score
+                    best_category = category
+
+            if best_category and best_score > 0:
+                if style == "emoji":
+                    new_name = f"{best_category}/{name}"
+                else:
+                    text_cat = best_category.split()[1]
+                    new_name = f"[{text_cat}] {name}"
+
+                changes.append({
+                    "playlist_id": playlist['id'],
+                    "original_name": name,
+                    "new_name": new_name,
+                    "detected_category": best_category,
+                    "applied": False
+                })
+                category_counts[best_category] += 1
+
+                if not dry_run:
+                    try:
+                        spotify_client.change_playlist_details(playlist['id'], name=new_name)
+                        changes[-1]["applied"] = True
+                    except Exception as e:
+                        logger.error(f"Error renaming playlist '{name}': {str(e)}")
+                calls.partial("changes", list(changes))
+            else:
+                skipped += 1
+    except calls.DeadlineExceeded:
+        truncated = True
+    else:
+        analyzed = len(owned)
+
+    calls.progress(analyzed, len(owned), f"Classified {analyzed} playlists")
+    result = {
+        "playlists_analyzed": analyzed,
+        "playlists_categorized": len(changes),
+        "playlists_skipped": skipped,
+        "dry_run": dry_run,
+        "changes": changes,
+        "category_summary": {k: v for k, v in category_counts.items() if v > 0}
+    }
+    if truncated:
+        result["truncated"] = True
+        result["playlists_not_analyzed"] = len(owned) - analyzed
+    return result
+
+
+def discover(arguments: dict) -> dict:
+    """Builds Discover recommendations. Runs synchronously, off the event loop."""
+    seed_type = arguments.get("seed_type")
+    seed_value = arguments.get("seed_value")
+    year_range = arguments.get("year_range", "2015-2025")
+    limit = min(arguments.get("limit", 30), 50)
+    create_playlist_flag = arguments.get("create_playlist", False)
+
+    # Validate inputs
+    if seed_type not in ["artist", "track", "listening_history"]:
+        raise ValueError(f"Invalid seed_type: {seed_type}. Must be 'artist', 'track', or 'listening_history'.")
+
+    if seed_type in ["artist", "track"] and not seed_value:
+        raise ValueError(f"seed_value is required for seed_type '{seed_type}'.")
+
+    # Step 1: Get seed genres
+    seed_genres = []
+    seed_artist_name = None
+    seed_popularity = 50  # Default middle-range
+    seed_year = ranking.release_year(year_range.split('-')[-1])
+    top_artists = []
+
+    if seed_type == "artist":
+        # Resolve the artist
+        artist = spotify_client.resolve_artist(seed_value)
+        if not artist:
+            raise ValueError(f"Artist '{seed_value}' not found.")
+        artist_details = spotify_client.get_artist(artist['id'])
+        seed_genres = artist_details.get('genres', [])[:3]
+        seed_artist_name = artist['name']
+        logger.info(f"Seed artist: {seed_artist_name}, genres: {seed_genres}")
+
+    elif seed_type == "track":
+        # Get track and its primary artist's genres
+        track_id = seed_value.split(':')[-1] if ':' in seed_value else seed_value
+        track = spotify_client.get_track(track_id)
+        seed_popularity = track.get('popularity', 50)
+        seed_year = ranking.release_year(track.get('album', {}).get('release_date')) or seed_year
+        if track.get('artists'):
+            artist_id = track['artists'][0]['id']
+            artist_details = spotify_client.get_artist(artist_id)
+            seed_genres = artist_details.get('genres', [])[:3]
+            seed_artist_name = artist_details['name']
+        logger.info(f"Seed track by {seed_artist_name}, popularity: {seed_popularity}, genres: {seed_genres}")
+
+    elif seed_type == "listening_history":
+        # Get genres from user's top artists
+        top_artists = spotify_client.get_top_artists(time_range="medium_term", limit=10)
+        genre_counts = {}
+        for artist in top_artists:
+            for genre in artist.get('genres', []):
+                genre_counts[genre] = genre_counts.get(genre, 0) + 1
+        # Get top 3 genres
+        seed_genres = sorted(genre_counts.keys(), key=lambda g: -genre_counts[g])[:3]
+        logger.info(f"Seed genres from listening history: {seed_genres}")
+
+    if not seed_genres:
+        raise ValueError("Could not determine genres for recommendations. Try a different seed.")
+    calls.partial("seed_genres", seed_genres)
+
+    # Checkpoints: seed, exclusions, one per genre, similar artists, ranking (and the playlist)
+    total_steps = len(seed_genres) + 4 + (1 if create_playlist_flag else 0)
+    calls.progress(1, total_steps, f"Seed genres: {', '.join(seed_genres)}")
+
+    exclude_ids = set()
+    candidates = {}  # track_id -> candidate, in discovery order
+
+    def add_candidate(track, genre, artist=None):
+        track_id = track['id']
+        if track_id in exclude_ids:
+            return
+        if track_id in candidates:
+            candidates[track_id]['genres'].add(genre)
+            return
+        artist = artist or (track['artists'][0] if track.get('artists') else {})
+        candidates[track_id] = {
+            'id': track_id,
+            'name': track['name'],
+            'artist': artist.get('name', 'Unknown'),
+            'artist_id': artist.get('id'),
+            'popularity': track.get('popularity', 0),
+            'release_date': track.get('album', {}).get('release_date'),
+            'genres': {genre},
+        }
+
+    # Out of time: rank what was found so far, without further requests
+    truncated = False
+    try:
+        # Step 2: Get tracks to exclude (recent + saved)
+        try:
+            exclude_ids.update(spotify_client.get_recent_track_ids(limit=50))
+            exclude_ids.update(spotify_client.get_user_saved_track_ids(limit=100))
+        except Exception as e:
+            logger.error(f"Error getting tracks to exclude: {str(e)}")
+        calls.progress(2, total_steps, "Collected tracks to exclude")
+
+        # Step 3: Search for tracks by genre
+        for searched, genre in enumerate(seed_genres, start=1):
+            try:
+                for track in spotify_client.search_by_genre(genre, year_range=year_range, limit=20):
+                    add_candidate(track, genre)
+            except Exception as e:
+                logger.error(f"Error searching genre '{genre}': {str(e)}")
+            calls.progress(2 + searched, total_steps, f"Searched {searched} of {len(seed_genres)} genres")
+
+        # Step 4: Add top tracks from user's similar artists
+        if seed_type in ["artist", "track"]:
+            try:
+                top_artists = spotify_client.get_top_artists(time_range="medium_term", limit=20)
+                matching_artists = []
+                for artist in top_artists:
+                    artist_genres = set(artist.get('genres', []))
+                    if artist_genres.intersection(seed_genres):
+                        matching_artists.append(artist)
+
+                for artist in matching_artists[:5]:
+                    try:
+                        top_tracks = spotify_client.get_artist_top_tracks(artist['id'])
+                        for track in top_tracks[:3]:
+                            add_candidate(track, 'top_artist_match', artist)
+                    except Exception as e:
+                        logger.error(f"Error getting top tracks for {artist['name']}: {str(e)}")
+                        continue
+            except Exception as e:
+                logger.error(f"Error getting matching top artists: {str(e)}")
+        calls.progress(len(seed_genres) + 3, total_steps, f"Found {len(candidates)} candidates")
+
+        # Step 5: Rank candidates by popularity, genre and release year, then re-rank for diversity
+        candidate_artist_ids = list({c['artist_id'] for c in candidates.values() if c['artist_id']})
+        try:
+            artist_genres = spotify_client.get_artists_genres(candidate_artist_ids)
+            for candidate in candidates.values():
+                candidate['genres'].update(artist_genres.get(candidate['artist_id'], []))
+        except Exception as e:
+            logger.error(f"Error getting genres for candidate artists: {str(e)}")
+    except calls.DeadlineExceeded:
+        truncated = True
+
+    profile_genres = {genre: 1.0 for genre in seed_genres}
+    for artist in top_artists:
+        for genre in artist.get('genres', []):
+            profile_genres[genre] = profile_genres.get(genre, 0.0) + 0.1
+
+    recommendations = ranking.rank_candidates(
+        list(candidates.values()),
+        vocabulary=ranking.build_genre_vocabulary(top_artists, seed_genres),
+        profile_genres=profile_genres,
+        seed_popularity=seed_popularity,
+        seed_year=seed_year,
+        limit=limit,
+        popularity_weight=arguments.get("popularity_weight", ranking.DEFAULT_POPULARITY_WEIGHT),
+        genre_weight=arguments.get("genre_weight", ranking.DEFAULT_GENRE_WEIGHT),
+        recency_weight=arguments.get("recency_weight", ranking.DEFAULT_RECENCY_WEIGHT),
+        diversity=arguments.get("diversity", ranking.DEFAULT_DIVERSITY),
+    )
+
+    logger.info(f"Generated {len(recommendations)} recommendations")
+    calls.progress(len(seed_genres) + 4, total_steps, f"Ranked {len(recommendations)} recommendations")
+
+    # Step 6: Optional playlist creation
+    discover_playlist = None
+    if create_playlist_flag and recommendations and not truncated:
+        playlist_name = f"Discover: {seed_artist_name or 'My Genres'}"
+        playlist = spotify_client.create_playlist(
+            name=playlist_name,
+            description=f"Recommendations based on {seed_type}: {seed_value or 'listening history'}"
+        )
+        track_ids = [t['id'] for t in recommendations]
+        added = spotify_client.add_tracks_to_playlist(playlist['id'], track_ids)
+        discover_playlist = {
+            "name": playlist['name'],
+            "id": playlist['id'],
+            "track_count": len(track_ids) if added else 0
+        }
+        calls.progress(total_steps, total_steps, "Playlist created")
+
+    result = {
+        "seed_type": seed_type,
+        "seed_value": seed_value or "listening_history",
+        "seed_genres": seed_genres,
+        "year_range": year_range,
+        "recommendations": [{
+            "name": t['name'],
+            "artist": t['artist'],
+            "id": t['id'],
+            "popularity": t['popularity'],
+            "score": t['score']
+        } for t in recommendations],
+        "count": len(recommendations)
+    }
+    if discover_playlist:
+        result["playlist_created"] = discover_playlist
+    if truncated:
+        result["truncated"] = True
+
+    return result
+
+
+def import_tracks(arguments: dict) -> dict:
+    """Creates the ImportTracks playlist. Runs synchronously, off the event loop."""
+    file_path = arguments.get("file_path")
+
+    # Resolve and write one chunk at a time so memory stays bounded on long lists
+    playlist_created = None
+    total = 0
+    matched = 0
+    failed = 0
+    unmatched = []
+    for chunk in importer.chunked(importer.iter_entries(file_path), IMPORT_CHUNK_SIZE):
+        # Checkpoint: a cancelled import stops between chunks, with the tracks added so far recorded
+        calls.check()
+        total += len(chunk)
+        track_ids = []
+        for entry, track_id in zip(chunk, spotify_client.resolve_track_entries(chunk)):
+            if track_id:
+                track_ids.append(track_id)
+            else:
+                unmatched.append({"line": entry['line'], "entry": entry['text']})
+        if track_ids:
+            if playlist_created is None:
+                playlist = spotify_client.create_playlist(
+                    name=arguments.get("playlist_name"),
+                    description=arguments.get("description") or f"Imported from {Path(file_path).name}",
+                    public=arguments.get("public", False)
+                )
+                playlist_created = {"name": playlist['name'], "id": playlist['id'], "track_count": 0}
+            # Only tracks that were actually written count as imported
+            if spotify_client.add_tracks_to_playlist(playlist_created['id'], track_ids):
+                matched += len(track_ids)
+                playlist_created['track_count'] = matched
+            else:
+                failed += len(track_ids)
+            calls.partial("playlist_created", dict(playlist_created))
+        calls.progress(total, message=f"Resolved {total} entries, added {matched} tracks")
+
+    return {
+        "playlist_created": playlist_created,
+        "total_entries": total,
+        "matched": matched,
+        "failed_to_add": failed,
+        "unmatched_count": len(unmatched),
+        "unmatched": unmatched
+    }
+
+
+# Tools whose work runs off the event loop, with progress notifications (and optionally as a background job)
+MULTI_STEP_TOOLS = {
+    "ArtistDeepDive": artist_deep_dive,
+    "PlaylistLibrarian": playlist_librarian,
+    "Discover": discover,
+}
+
+
+async def run_with_progress(name: str, work, arguments: dict, deadline: Optional[float] = None) -> dict:
+    """
+    Runs a multi-step tool in a worker thread. If the caller sent a progressToken, checkpoints are
+    forwarded as MCP progress notifications. Partial results recorded since the previous checkpoint
+    are attached to the next notification under 'partial'.
+    If the client cancels the request, the work stops at its next Spotify request and is recorded
+    as a cancelled job, listing the side effects that already happened.
+    - deadline: time budget in seconds; the tools return partial results marked 'truncated' when it runs out.
+    """
+    context = server.request_context
+    token = context.meta.progressToken if context.meta else None
+    if token is None:
+        return await run_cancellable(name, work, arguments, calls.CallContext(timeout=deadline))
+
+    loop = asyncio.get_running_loop()
+    session = context.session
+    pending_partial = set()
+
+    def notify(call: calls.CallContext):
+        extra = {}
+        if pending_partial:
+            extra['partial'] = {key: call.partial_results[key] for key in pending_partial}
+            pending_partial.clear()
+        params = types.ProgressNotificationParams(progressToken=token, progress=call.done, total=call.total,
+                                                  message=call.message, **extra)
+        notification = types.ServerNotification(types.ProgressNotification(method="notifications/progress",
+                                                                           params=params))
+        asyncio.run_coroutine_threadsafe(session.send_notification(notification), loop)
+
+    call_context = calls.CallContext(on_progress=notify, on_partial=lambda call, key: pending_partial.add(key),
+                                     timeout=deadline)
+    return await run_cancellable(name, work, arguments, call_context)
+
+
+async def run_cancellable(name: str, work, arguments: dict, call_context: calls.CallContext) -> dict:
+    task = asyncio.ensure_future(asyncio.to_thread(calls.run, call_context, work, arguments))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        call_context.cancel()
+
+        def report(finished):
+            error = finished.exception()
+            if error is not None and not isinstance(error, calls.Cancelled):
+                logger.error(f"{name} failed after it was cancelled: {error}")
+            job = job_manager.record_cancelled(name, arguments, call_context)
+            logger.info(f"{name} cancelled; side effects so far: {job['partial']} (job {job['id']})")
+
+        task.add_done_callback(report)
+        raise
+
+
 async def main():
     try:
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-            await server.run(
-                read_stream,
-                write_stream,
-                server.create_initialization_options()
-            )
+            options = server.create_initialization_options()
+            # Resource subscriptions are handled, but the SDK does not advertise them by itself
+            options.capabilities.resources.subscribe = True
+            if not player.PLAYER_POLLING:
+                await server.run(
+                    read_stream,
+                    write_stream,
+                    options
+                )
+                return
+            # Poll the player alongside the session; polling stops when the client disconnects
+            async with asyncio.TaskGroup() as tg:
+                poller = tg.create_task(player_poller.run())
+                await server.run(
+                    read_stream,
+                    write_stream,
+                    options
+                )
+                poller.cancel()
     except Exception as e:
         logger.error(f"Server error occurred: {str(e)}")
         raise
+    finally:
+        stats = spotify_client.transport.stats()
+        logger.info(f"HTTP: {stats['requests']} requests over {stats['connections']} connections "
+                    f"({stats['reuse_ratio']:.0%} reused)")
+        if stats['cache']:
+            logger.info(f"HTTP cache: {stats['cache']['hits']} fresh hits, {stats['cache']['revalidated']} "
+                        f"revalidated (304), {stats['cache']['misses']} misses")
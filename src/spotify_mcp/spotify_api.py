@@ -1,22 +1,88 @@
+import contextvars
 import logging
 import os
-from typing import Optional, Dict, List
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Optional, Dict, List, Tuple, TypeVar
 
+import requests
 import spotipy
 from dotenv import load_dotenv
+from spotipy import SpotifyException
 from spotipy.cache_handler import CacheFileHandler
 from spotipy.oauth2 import SpotifyOAuth
 
-from . import utils
+from . import calls, entities, scheduler, streaming, transport, utils
+from .cache import CACHE_DIR, PersistentCache, TTLCache
 from .remote_cache_handler import RemoteCacheHandler
 
 load_dotenv()
 
+T = TypeVar('T')
+
 CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 REDIRECT_URI = os.getenv("SPOTIFY_REDIRECT_URI")
 BACKEND_URL = os.getenv("SPOTIFY_BACKEND_URL")
 
+# Search results are served from memory for SEARCH_CACHE_TTL seconds, then for up to
+# SEARCH_CACHE_STALE_TTL more seconds while they are refreshed in the background.
+SEARCH_CACHE_TTL = float(os.getenv("SPOTIFY_SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_STALE_TTL = float(os.getenv("SPOTIFY_SEARCH_CACHE_STALE_TTL", "3600"))
+
+# Artist IDs never change, so resolved names are kept for a long time; names that
+# matched nothing are retried sooner in case the catalog (or the spelling) changes.
+ARTIST_CACHE_TTL = float(os.getenv("SPOTIFY_ARTIST_CACHE_TTL", str(30 * 24 * 3600)))
+ARTIST_CACHE_NEGATIVE_TTL = float(os.getenv("SPOTIFY_ARTIST_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+
+# Top tracks/artists change at most daily. Each time range is fetched once at the
+# API maximum and every caller slices from that snapshot.
+TOP_ITEMS_CACHE_TTL = float(os.getenv("SPOTIFY_TOP_ITEMS_CACHE_TTL", str(6 * 3600)))
+TOP_ITEMS_MAX_LIMIT = 50
+
+# Library data (playlists, playlist contents) and the current track are kept for
+# resource reads; tool calls always fetch live and refresh these entries.
+LIBRARY_CACHE_TTL = float(os.getenv("SPOTIFY_LIBRARY_CACHE_TTL", "300"))
+NOW_PLAYING_CACHE_TTL = float(os.getenv("SPOTIFY_NOW_PLAYING_CACHE_TTL", "5"))
+
+# With background polling on, the player snapshot answers current-track and
+# is-playing checks while it is younger than this many seconds
+PLAYER_STATE_MAX_AGE = float(os.getenv("SPOTIFY_PLAYER_STATE_MAX_AGE", "10"))
+# Apply the expected effect of playback commands to the player snapshot instead of waiting for the next poll
+OPTIMISTIC_PLAYER_STATE = os.getenv("SPOTIFY_OPTIMISTIC_PLAYER_STATE", "1").lower() in ("1", "true", "yes")
+
+# Attempts per track for bulk queue additions that fail with a transient error
+QUEUE_ADD_RETRIES = int(os.getenv("SPOTIFY_QUEUE_ADD_RETRIES", "3"))
+# Upcoming tracks the queue endpoint returns; whatever is queued further back cannot be seen
+QUEUE_VISIBLE_TRACKS = 20
+
+# Fewest skips that try a jump. Below this, stepping with next_track takes no more requests than a
+# jump (queue read, playback read, a context page and the play command)
+JUMP_MIN_SKIPS = 4
+
+# Projections (the `fields` parameter) for playlist item pages, one per kind of caller.
+# Without them every item carries the full track, album, images and markets.
+PLAYLIST_ITEM_FIELDS = {
+    'ids': "items(track(id)),next,total",
+    'artists': "items(track(id,artists(id))),next,total",
+    'display': "items(added_at,track(id,name,duration_ms,track_number,is_playable,artists(id,name),album(id,name))),"
+               "next,total",
+}
+# Projection for a playlist with its first page of tracks, as read by utils.parse_playlist
+PLAYLIST_FIELDS = "id,name,description,owner(id,display_name),tracks(total,next," \
+                  "items(track(id,name,is_playable,artists(id,name))))"
+# Response fields dropped as soon as a response is decoded: large and never read
+DROPPED_FIELDS = frozenset({'available_markets'})
+
+# Upper bound on Spotify requests the client runs in parallel
+MAX_CONCURRENCY = int(os.getenv("SPOTIFY_MAX_CONCURRENCY", "8"))
+# How often a wait on concurrent requests checks whether its call was cancelled
+CANCEL_CHECK_INTERVAL = 0.25
+# Times a request answered with 429 is sent again after its Retry-After, and the longest Retry-After waited for
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_MAX_WAIT = 60.0
+
 # Normalize the redirect URI to meet Spotify's requirements
 if REDIRECT_URI:
     REDIRECT_URI = utils.normalize_redirect_uri(REDIRECT_URI)
@@ -44,6 +110,91 @@ SCOPES = [
 ]
 
 
+class QueueStateUnknown(Exception):
+    """An insert failed ambiguously, and the part of the queue Spotify returns does not show whether it went through."""
+
+
+class Spotify(spotipy.Spotify):
+    """
+    spotipy client whose requests observe the current tool call (see calls.py)
+    and are scheduled by priority class (see scheduler.py).
+    """
+
+    # Smallest timeout given to a request near the deadline; below this it would fail for sure
+    MIN_REQUEST_TIMEOUT = 0.5
+
+    def __init__(self, *args, request_scheduler: scheduler.RequestScheduler, **kwargs):
+        self.request_scheduler = request_scheduler
+        super().__init__(*args, **kwargs)
+
+    @property
+    def requests_timeout(self):
+        # Each request gets at most the time left to the call's deadline
+        remaining = calls.remaining()
+        if remaining is None:
+            return self._requests_timeout
+        remaining = max(remaining, self.MIN_REQUEST_TIMEOUT)
+        if isinstance(self._requests_timeout, tuple):  # (connect, read)
+            return tuple(min(timeout, remaining) for timeout in self._requests_timeout)
+        return min(self._requests_timeout, remaining) if self._requests_timeout else remaining
+
+    @requests_timeout.setter
+    def requests_timeout(self, value):
+        self._requests_timeout = value
+
+    def _internal_call(self, method, url, payload, params):
+        result = self._send(lambda: super(Spotify, self)._internal_call(method, url, payload, params))
+        return _drop_fields(result)
+
+    def get_page(self, url: str, narrow: Optional[Callable[[dict], object]] = None, **params) -> dict:
+        """
+        GETs a paging object, decoding its items one at a time while the body is read (see streaming.py).
+        Unlike _internal_call, the response is never decoded as a whole.
+        - narrow: applied to each item as soon as it is decoded; the page's 'items' holds what it returns.
+        """
+        if not url.startswith("http"):
+            url = self.prefix + url
+        return self._send(lambda: self._get_page(url, narrow, params))
+
+    def _get_page(self, url: str, narrow: Optional[Callable[[dict], object]], params: dict) -> dict:
+        headers = self._auth_headers()
+        if self.language is not None:
+            headers["Accept-Language"] = self.language
+        try:
+            response = self._session.get(url, headers=headers, params=params, proxies=self.proxies,
+                                         timeout=self.requests_timeout, stream=True)
+        except requests.exceptions.RetryError as e:
+            raise SpotifyException(429, -1, f"{e.request.path_url}:\n Max Retries") from e
+        with response:
+            if not response.ok:
+                raise _spotify_error(response)
+            return streaming.decode_page(response.iter_content(streaming.CHUNK_SIZE), narrow,
+                                         object_hook=_drop_fields_hook)
+
+    def _send(self, request: Callable[[], T]) -> T:
+        """
+        Runs request in a scheduler slot. A 429 answer holds back other requests for its Retry-After;
+        the request is then sent again, without holding a slot while it waits.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            # Nothing more is sent for a call that has been cancelled
+            calls.check()
+            try:
+                with self.request_scheduler.slot():
+                    return request()
+            except SpotifyException as e:
+                retry_after = _retry_after(e)
+                if retry_after is None:
+                    raise
+                # Give the remaining rate limit to interactive requests until Spotify accepts requests again
+                self.request_scheduler.backoff(retry_after)
+                remaining = calls.remaining()
+                if attempt == RATE_LIMIT_RETRIES or retry_after > RATE_LIMIT_MAX_WAIT or \
+                        (remaining is not None and retry_after >= remaining):
+                    raise
+                self.request_scheduler.wait_for_backoff()
+
+
 class Client:
     def __init__(self, logger: logging.Logger):
         """Initialize Spotify client with necessary permissions"""
@@ -51,22 +202,31 @@ class Client:
 
         scope = "user-library-read,user-read-playback-state,user-modify-playback-state,user-read-currently-playing,playlist-read-private,playlist-read-collaborative,playlist-modify-private,playlist-modify-public"
 
+        # One keep-alive connection pool for all outgoing HTTP, sized for the requests the scheduler lets run at once
+        self.transport = transport.Transport(pool_size=MAX_CONCURRENCY)
+
         try:
             # Use remote cache handler if backend URL is configured, otherwise use local file cache
             if BACKEND_URL:
                 self.logger.info(f"Using remote cache handler with backend: {BACKEND_URL}")
-                cache_handler = RemoteCacheHandler(backend_url=BACKEND_URL)
+                cache_handler = RemoteCacheHandler(backend_url=BACKEND_URL, session=self.transport.session)
             else:
                 self.logger.info("Using local file cache handler")
                 cache_handler = CacheFileHandler()
 
-            self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-                scope=scope,
-                client_id=CLIENT_ID,
-                client_secret=CLIENT_SECRET,
-                redirect_uri=REDIRECT_URI,
-                cache_handler=cache_handler,
-                open_browser=False))  # Don't open browser - we use web auth
+            self.request_scheduler = scheduler.RequestScheduler(MAX_CONCURRENCY)
+            self.sp = Spotify(request_scheduler=self.request_scheduler,
+                              requests_session=self.transport.session,
+                              requests_timeout=self.transport.timeout,
+                              auth_manager=SpotifyOAuth(
+                                  scope=scope,
+                                  client_id=CLIENT_ID,
+                                  client_secret=CLIENT_SECRET,
+                                  redirect_uri=REDIRECT_URI,
+                                  cache_handler=cache_handler,
+                                  requests_session=self.transport.session,
+                                  requests_timeout=self.transport.timeout,
+                                  open_browser=False))  # Don't open browser - we use web auth
 
             self.auth_manager: SpotifyOAuth = self.sp.auth_manager
             self.cache_handler = cache_handler
@@ -75,27 +235,174 @@ class Client:
             raise
 
         self.username = None
+        self.search_cache = TTLCache(SEARCH_CACHE_TTL, SEARCH_CACHE_STALE_TTL)
+        self.artist_cache = PersistentCache(CACHE_DIR / "artists.json", ARTIST_CACHE_TTL)
+        self.top_items_cache = TTLCache(TOP_ITEMS_CACHE_TTL)
+        self.library_cache = TTLCache(LIBRARY_CACHE_TTL)
+        self.player_cache = TTLCache(NOW_PLAYING_CACHE_TTL)
+        # Player snapshot kept fresh by player.PlaybackPoller; only trusted while use_player_state is set
+        self.player_state: Optional[Dict] = None
+        self.player_state_at = 0.0
+        self.use_player_state = False
+        # (context uri, position) of the last track jumped to; where the next jump's context lookup starts
+        self.jump_hint: Optional[Tuple[str, int]] = None
+        # One pool per priority class, so queued bulk work cannot hold up other calls' concurrent requests;
+        # how many of them actually reach Spotify at once is up to the request scheduler
+        self.executors = {level: ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="spotify")
+                          for level in (scheduler.INTERACTIVE, scheduler.NORMAL, scheduler.BULK)}
+
+    def _submit(self, func: Callable, *args) -> Future:
+        """Runs func on the executor of the current priority class, within the current call context."""
+        executor = self.executors[scheduler.current_priority()]
+        return executor.submit(contextvars.copy_context().run, func, *args)
+
+    def _map(self, func: Callable, items: Iterable) -> List:
+        """Like executor.map, but the requests run within the current call context and are abandoned on cancellation."""
+        futures = [self._submit(func, item) for item in items]
+        self._wait(futures)
+        return [f.result() for f in futures]
+
+    def _wait(self, futures: List[Future]):
+        """Waits for futures. If the call is cancelled meanwhile, requests that have not started are dropped."""
+        pending = set(futures)
+        try:
+            while pending:
+                calls.check()
+                _, pending = wait(pending, timeout=CANCEL_CHECK_INTERVAL)
+        except calls.Cancelled:
+            for future in pending:
+                future.cancel()
+            raise
 
     @utils.validate
     def set_username(self, device=None):
         self.username = self.sp.current_user()['display_name']
 
-    @utils.validate
     def search(self, query: str, qtype: str = 'track', limit=10, device=None):
         """
-        Searches based of query term.
+        Searches based of query term. A query answered recently is served from the search cache
+        without any request, auth check included.
         - query: query term
         - qtype: the types of items to return. One or more of 'artist', 'album',  'track', 'playlist'.
                  If multiple types are desired, pass in a comma separated string; e.g. 'track,album'
         - limit: max # items to return
         """
-        if self.username is None:
-            self.set_username()
-        results = self.sp.search(q=query, limit=limit, type=qtype)
+        if self.username is None or self.search_cache.peek(utils.search_cache_key(query, qtype, limit)) is None:
+            # Same handling as utils.ensure_auth, only for searches that go to Spotify
+            if not self.auth_ok():
+                self.auth_refresh()
+            if self.username is None:
+                self.set_username()
+        results = self._search(query, qtype=qtype, limit=limit)
         if not results:
             raise ValueError("No search results found.")
         return utils.parse_search_results(results, qtype, self.username)
 
+    @utils.ensure_auth
+    def search_many(self, queries: List[str], qtype: str = 'track', limit=10, top_hit_only=False) -> Dict[str, dict]:
+        """
+        Runs many searches concurrently after a single auth check. Returns results keyed by query;
+        a query that failed maps to {'error': message} without affecting the others.
+        - queries: query terms.
+        - qtype: the types of items to return, as in search.
+        - limit: max # items to return per query and type.
+        - top_hit_only: return only the best match per type (one item instead of a list, None if nothing matched).
+        """
+        for t in qtype.split(","):
+            if t not in ('track', 'artist', 'playlist', 'album'):
+                raise ValueError(f"Unknown qtype {qtype}")
+        result_keys = [f"{t}s" for t in qtype.split(",")]
+        if self.username is None:
+            self.set_username()
+        limit = 1 if top_hit_only else limit
+        queries = list(dict.fromkeys(queries))
+        pages = self._map(lambda q: self._search_or_error(q, qtype=qtype, limit=limit), queries)
+
+        results = {}
+        for query, page in zip(queries, pages):
+            if isinstance(page, Exception):
+                results[query] = {'error': str(page)}
+                continue
+            parsed = utils.parse_search_results(page, qtype, self.username)
+            if top_hit_only:
+                # parse_search_results leaves out types without results; every requested type is reported
+                parsed = {k: parsed[k][0] if parsed.get(k) else None for k in result_keys}
+            results[query] = parsed
+        return results
+
+    def _search_or_error(self, query: str, qtype: str, limit: int):
+        """_search, returning the exception instead of raising it so one query cannot fail a batch."""
+        try:
+            return self._search(query, qtype=qtype, limit=limit)
+        except Exception as e:
+            self.logger.error(f"Error searching for '{query}': {str(e)}")
+            return e
+
+    @utils.ensure_auth
+    def resolve_track_entries(self, entries: List[dict]) -> List[Optional[str]]:
+        """
+        Resolves imported track entries (see importer.iter_entries) to track IDs concurrently, in input order.
+        Each entry tries its track link, then an ISRC search, then an artist/title search, then the raw text.
+        - entries: parsed entries. None is returned for entries that match nothing.
+        """
+        return self._map(self._resolve_track_entry, entries)
+
+    def _resolve_track_entry(self, entry: dict) -> Optional[str]:
+        if entry.get('track_id'):
+            return entry['track_id']
+
+        queries = []
+        if entry.get('isrc'):
+            queries.append(f"isrc:{entry['isrc']}")
+        if entry.get('artist') and entry.get('title'):
+            queries.append(utils.build_search_query("", artist=entry['artist'], track=entry['title']))
+        if entry.get('text'):
+            queries.append(entry['text'])
+
+        for query in queries:
+            try:
+                items = self._search(query, qtype='track', limit=1).get('tracks', {}).get('items', [])
+            except Exception as e:
+                self.logger.error(f"Error resolving '{entry.get('text')}' with query '{query}': {str(e)}")
+                continue
+            if items and items[0]:
+                return items[0]['id']
+        return None
+
+    def _search(self, query: str, qtype: str = 'track', limit=10, offset=0) -> dict:
+        """Runs a raw search, served from the search cache when an equivalent query was made recently."""
+        query = utils.normalize_search_query(query)
+        key = utils.search_cache_key(query, qtype, limit, offset)
+        return self.search_cache.get(key, lambda: self.sp.search(q=query, limit=limit, offset=offset, type=qtype))
+
+    def resolve_artist(self, name: str) -> Optional[Dict]:
+        """
+        Resolves an artist name to {'name', 'id'}, or None if nothing matches.
+        Lookups are folded (case, diacritics, spacing) and cached on disk, including misses,
+        so repeated artist-seeded tools skip the search entirely.
+        - name: artist name as typed by the user.
+        """
+        key = utils.fold_name(name)
+        if key in self.artist_cache:
+            return self.artist_cache.get(key)
+
+        artist = self._lookup_artist(name)
+        if artist is None:
+            self.artist_cache.set(key, None, ttl=ARTIST_CACHE_NEGATIVE_TTL)
+        else:
+            self.artist_cache.set(key, artist)
+        return artist
+
+    @utils.ensure_auth
+    def _lookup_artist(self, name: str) -> Optional[Dict]:
+        # Prefer an exact (folded) name match among the top hits over plain search relevance
+        items = self._search(name, qtype='artist', limit=5).get('artists', {}).get('items', [])
+        artists = [utils.parse_artist(a) for a in items if a]
+        if not artists:
+            return None
+        key = utils.fold_name(name)
+        return next((a for a in artists if utils.fold_name(a['name']) == key), artists[0])
+
     def recommendations(self, artists: Optional[List] = None, tracks: Optional[List] = None, limit=20):
         # doesnt work
         recs = self.sp.recommendations(seed_artists=artists, seed_tracks=tracks, limit=limit)
@@ -114,39 +421,103 @@ class Client:
                 album_info = utils.parse_album(self.sp.album(item_id), detailed=True)
                 return album_info
             case 'artist':
-                artist_info = utils.parse_artist(self.sp.artist(item_id), detailed=True)
-                albums = self.sp.artist_albums(item_id)
-                top_tracks = self.sp.artist_top_tracks(item_id)['tracks']
-                albums_and_tracks = {
-                    'albums': albums,
-                    'tracks': {'items': top_tracks}
-                }
-                parsed_info = utils.parse_search_results(albums_and_tracks, qtype="album,track")
-                artist_info['top_tracks'] = parsed_info['tracks']
-                artist_info['albums'] = parsed_info['albums']
-
-                return artist_info
+                return self._artist_info(self.sp.artist(item_id),
+                                         self.sp.artist_albums(item_id),
+                                         self.sp.artist_top_tracks(item_id)['tracks'])
             case 'playlist':
                 if self.username is None:
                     self.set_username()
-                playlist = self.sp.playlist(item_id)
+                playlist = self.sp.playlist(item_id, fields=PLAYLIST_FIELDS)
                 self.logger.info(f"playlist info is {playlist}")
-                playlist_info = utils.parse_playlist(playlist, self.username, detailed=True)
+                entity = entities.Playlist.from_api(playlist, with_tracks=True)
+                self.library_cache.set(('playlist', item_id), entity)
 
-                return playlist_info
+                return entity.to_dict(self.username, detailed=True)
 
         raise ValueError(f"Unknown qtype {qtype}")
 
+    def get_infos(self, item_uris: List[str]) -> List[Optional[dict]]:
+        """
+        Returns info for many items, in input order (None for items that were not found).
+        Items are grouped by type and fetched with the multi-ID endpoints (50 tracks, 20 albums
+        or 50 artists per request); artist sub-resources and playlists are fetched concurrently.
+        - item_uris: uris like 'spotify:track:xxxxxx', 'spotify:album:xxxxxx'. Types may be mixed.
+        """
+        ids_by_type = defaultdict(dict)
+        for item_uri in item_uris:
+            _, qtype, item_id = item_uri.split(":")
+            if qtype not in ('track', 'album', 'artist', 'playlist'):
+                raise ValueError(f"Unknown qtype {qtype}")
+            ids_by_type[qtype][item_id] = None
+
+        infos = {}
+        track_ids = list(ids_by_type['track'])
+        for i in range(0, len(track_ids), 50):
+            batch = track_ids[i:i+50]
+            for item_id, track in zip(batch, self.sp.tracks(batch)['tracks']):
+                infos['track', item_id] = utils.parse_track(track, detailed=True)
+
+        album_ids = list(ids_by_type['album'])
+        for i in range(0, len(album_ids), 20):
+            batch = album_ids[i:i+20]
+            for item_id, album in zip(batch, self.sp.albums(batch)['albums']):
+                infos['album', item_id] = utils.parse_album(album, detailed=True) if album else None
+
+        artist_ids = list(ids_by_type['artist'])
+        artists = []
+        for i in range(0, len(artist_ids), 50):
+            artists.extend(self.sp.artists(artist_ids[i:i+50])['artists'])
+        sub_requests = [(self._submit(self.sp.artist_albums, artist['id']),
+                         self._submit(self.sp.artist_top_tracks, artist['id'])) if artist else None
+                        for artist in artists]
+        self._wait([f for pending in sub_requests if pending for f in pending])
+        for item_id, artist, pending in zip(artist_ids, artists, sub_requests):
+            if pending is None:
+                infos['artist', item_id] = None
+                continue
+            albums, top_tracks = pending
+            infos['artist', item_id] = self._artist_info(artist, albums.result(), top_tracks.result()['tracks'])
+
+        playlist_ids = list(ids_by_type['playlist'])
+        if playlist_ids and self.username is None:
+            self.set_username()
+        playlists = self._map(lambda playlist_id: self.sp.playlist(playlist_id, fields=PLAYLIST_FIELDS), playlist_ids)
+        for item_id, playlist in zip(playlist_ids, playlists):
+            entity = entities.Playlist.from_api(playlist, with_tracks=True)
+            self.library_cache.set(('playlist', item_id), entity)
+            infos['playlist', item_id] = entity.to_dict(self.username, detailed=True)
+
+        return [infos[tuple(item_uri.split(":")[1:])] for item_uri in item_uris]
+
+    @staticmethod
+    def _artist_info(artist: dict, albums: dict, top_tracks: List[dict]) -> dict:
+        """Detailed artist info with its albums page and top tracks."""
+        artist_info = utils.parse_artist(artist, detailed=True)
+        albums_and_tracks = {
+            'albums': albums,
+            'tracks': {'items': top_tracks}
+        }
+        parsed_info = utils.parse_search_results(albums_and_tracks, qtype="album,track")
+        artist_info['top_tracks'] = parsed_info['tracks']
+        artist_info['albums'] = parsed_info['albums']
+
+        return artist_info
+
     def get_current_track(self) -> Optional[Dict]:
         """Get information about the currently playing track"""
+        state = self._fresh_player_state()
+        if state is not None:
+            return dict(state['track'], is_playing=state['is_playing']) if state['track'] else None
         try:
             # current_playback vs current_user_playing_track?
             current = self.sp.current_user_playing_track()
             if not current:
                 self.logger.info("No playback session found")
+                self.player_cache.set('now_playing', None)
                 return None
             if current.get('currently_playing_type') != 'track':
                 self.logger.info("Current playback is not a track")
+                self.player_cache.set('now_playing', None)
                 return None
 
             track_info = utils.parse_track(current['item'])
@@ -155,6 +526,7 @@ class Client:
 
             self.logger.info(
                 f"Current track: {track_info.get('name', 'Unknown')} by {track_info.get('artist', 'Unknown')}")
+            self.player_cache.set('now_playing', track_info)
             return track_info
         except Exception as e:
             self.logger.error("Error getting current track info.")
@@ -190,6 +562,10 @@ class Client:
 
             self.logger.info(f"Starting playback of on {device}: context_uri={context_uri}, uris={uris}")
             result = self.sp.start_playback(uris=uris, context_uri=context_uri, device_id=device_id)
+            if spotify_uri is None:
+                self._player_changed(is_playing=True)
+            else:
+                self._player_changed()
             self.logger.info(f"Playback result: {result}")
             return result
         except Exception as e:
@@ -199,9 +575,15 @@ class Client:
     @utils.validate
     def pause_playback(self, device=None):
         """Pauses playback."""
-        playback = self.sp.current_playback()
-        if playback and playback.get('is_playing'):
+        state = self._fresh_player_state()
+        if state is not None:
+            is_playing = state['is_playing']
+        else:
+            playback = self.sp.current_playback()
+            is_playing = bool(playback and playback.get('is_playing'))
+        if is_playing:
             self.sp.pause_playback(device.get('id') if device else None)
+            self._player_changed(is_playing=False)
 
     @utils.validate
     def add_to_queue(self, track_id: str, device=None):
@@ -210,6 +592,94 @@ class Client:
         - track_id: ID of track to play.
         """
         self.sp.add_to_queue(track_id, device.get('id') if device else None)
+        # The queue head may have changed; make the next snapshot re-read the queue
+        if self.player_state:
+            self.player_state['queue_known'] = False
+
+    @utils.validate
+    def add_many_to_queue(self, track_ids: List[str], device=None) -> Dict:
+        """
+        Adds tracks to the queue in the given order, with a single auth and device check.
+        Inserts are sent back to back on the same connection; each one waits for the previous to be
+        acknowledged, since Spotify appends in arrival order. A transient failure is retried after checking
+        the queue, so a request that failed after Spotify applied it is not sent twice. The queue endpoint only
+        returns the next QUEUE_VISIBLE_TRACKS or so tracks: if the failed track's place lies beyond them (a long
+        queue, or a long run), whether it was queued is unknown, and the run stops there rather than risk a
+        duplicate. The first permanent failure stops the run too, so the queue never ends up out of order.
+        - track_ids: track IDs or URIs.
+        Returns {'added': [...], 'not_added': [...], 'error': message or None}. After an unknown outcome the
+        first entry of not_added may be in the queue after all.
+        """
+        track_ids = [t.split(':')[-1] for t in track_ids]
+        device_id = device.get('id') if device else None
+        # Baseline for recognising whether an ambiguous failure of the first insert went through
+        baseline = self._queue_ids()
+        added = []
+        try:
+            for track_id in track_ids:
+                self._queue_with_retry(track_id, device_id, added, baseline)
+                added.append(track_id)
+        except (SpotifyException, requests.RequestException, QueueStateUnknown) as e:
+            self.logger.error(f"Error adding {track_ids[len(added)]} to queue: {e}")
+            return {'added': added, 'not_added': track_ids[len(added):], 'error': str(e)}
+        finally:
+            if added and self.player_state:
+                self.player_state['queue_known'] = False
+        return {'added': added, 'not_added': [], 'error': None}
+
+    def _queue_with_retry(self, track_id: str, device_id: Optional[str], added: List[str], baseline: List[str]):
+        for attempt in range(QUEUE_ADD_RETRIES + 1):
+            try:
+                self.sp.add_to_queue(track_id, device_id)
+                return
+            except (SpotifyException, requests.RequestException) as e:
+                status = getattr(e, 'http_status', None)
+                transient = status == 429 or (status or 0) >= 500 or \
+                    isinstance(e, (requests.ConnectionError, requests.Timeout))
+                if not transient or attempt == QUEUE_ADD_RETRIES:
+                    raise
+                if status == 429:
+                    # Rejected before it was applied; just wait as asked
+                    retry_after = (getattr(e, 'headers', None) or {}).get('Retry-After')
+                    time.sleep(min(float(retry_after or 1), 10))
+                    continue
+                time.sleep(0.5 * 2 ** attempt)
+                queued = self._was_queued(track_id, added, baseline)
+                if queued is None:
+                    raise QueueStateUnknown(f"Could not tell whether {track_id} was queued after: {e}. It was not "
+                                            f"resent; Spotify only shows the next {QUEUE_VISIBLE_TRACKS} tracks.")
+                if queued:
+                    self.logger.info(f"{track_id} reached the queue despite the error; not resending")
+                    return
+
+    def _was_queued(self, track_id: str, added: List[str], baseline: List[str]) -> Optional[bool]:
+        """
+        Whether track_id, inserted after the run's tracks in added, is in the queue: True or False if the queue
+        shows it, None if its place is beyond the visible part. Entries already in the baseline snapshot,
+        taken before the run, do not count.
+        """
+        queue = self._queue_ids()
+        # A short answer is the whole queue; a full one may end before the place of the new track
+        complete = len(queue) < QUEUE_VISIBLE_TRACKS
+        if not added:
+            if queue.count(track_id) > baseline.count(track_id):
+                return True
+            return False if complete else None
+        # Later tracks land right behind the previous one from the same run
+        previous_id = added[-1]
+        pair = (previous_id, track_id)
+        if _pairs(queue).count(pair) > _pairs(baseline).count(pair) + _pairs(added).count(pair):
+            return True
+        if complete:
+            return False
+        # The previous track of the run is visible, and so is the place right behind every copy of it
+        if queue.count(previous_id) > baseline.count(previous_id) + added[:-1].count(previous_id) and \
+                queue[-1] != previous_id:
+            return False
+        return None
+
+    def _queue_ids(self) -> List[str]:
+        return [t['id'] for t in self.sp.queue().get('queue') or [] if t]
 
     @utils.validate
     def get_queue(self, device=None):
@@ -237,32 +707,66 @@ class Client:
             return True
         return False
 
+    @utils.ensure_username
     def get_current_user_playlists(self, limit=50) -> List[Dict]:
         """
         Get current user's playlists.
         - limit: Max number of playlists to return.
         """
+        return [playlist.to_dict(self.username) for playlist in self._fetch_playlists()]
+
+    def _fetch_playlists(self) -> Tuple[entities.Playlist, ...]:
         playlists = self.sp.current_user_playlists()
         if not playlists:
             raise ValueError("No playlists found.")
-        return [utils.parse_playlist(playlist, self.username) for playlist in playlists['items']]
+        parsed = tuple(entities.Playlist.from_api(playlist) for playlist in playlists['items'])
+        self.library_cache.set('playlists', parsed)
+        return parsed
+
+    # The library cache holds entities (see entities.py); these return the same dicts the tools do
+
+    @utils.ensure_username
+    def get_cached_playlists(self) -> List[Dict]:
+        """Current user's playlists from the library cache, fetched if missing or expired."""
+        playlists = self.library_cache.get('playlists', self._fetch_playlists)
+        return [playlist.to_dict(self.username) for playlist in playlists]
 
     @utils.ensure_username
-    def get_playlist_tracks(self, playlist_id: str, limit=50) -> List[Dict]:
+    def get_cached_playlist(self, playlist_id: str) -> Dict:
+        """Detailed playlist info from the library cache, fetched if missing or expired."""
+        playlist = self.library_cache.get(('playlist', playlist_id), lambda: self._fetch_playlist(playlist_id))
+        return playlist.to_dict(self.username, detailed=True)
+
+    def _fetch_playlist(self, playlist_id: str) -> entities.Playlist:
+        playlist = self.sp.playlist(playlist_id, fields=PLAYLIST_FIELDS)
+        return entities.Playlist.from_api(playlist, with_tracks=True)
+
+    def get_cached_current_track(self) -> Optional[Dict]:
+        """Currently playing track from the player cache, fetched if missing or expired."""
+        return self.player_cache.get('now_playing', self.get_current_track)
+
+    def _playlist_changed(self, playlist_id: str):
+        """Drops cached data a playlist modification makes stale."""
+        self.library_cache.invalidate(('playlist', playlist_id))
+        self.library_cache.invalidate('playlists')
+
+    @utils.ensure_username
+    def get_playlist_tracks(self, playlist_id: str, limit=100) -> List[Dict]:
         """
         Get tracks from a playlist.
         - playlist_id: ID of the playlist to get tracks from.
-        - limit: Max number of tracks to return.
+        - limit: Max number of tracks to return (at most 100).
         """
-        playlist = self.sp.playlist(playlist_id)
-        if not playlist:
+        page = self.get_playlist_items_page(playlist_id, limit=min(limit, 100), projection='display',
+                                            narrow=lambda item: utils.parse_track(item['track']))
+        if not page:
             raise ValueError("No playlist found.")
-        return utils.parse_tracks(playlist['tracks']['items'])
+        return [track for track in page['items'] if track]
 
     @utils.ensure_username
-    def add_tracks_to_playlist(self, playlist_id: str, track_ids: List[str], position: Optional[int] = None):
+    def add_tracks_to_playlist(self, playlist_id: str, track_ids: List[str], position: Optional[int] = None) -> bool:
         """
-        Add tracks to a playlist.
+        Add tracks to a playlist. Returns whether they were added; errors are logged, not raised.
         - playlist_id: ID of the playlist to modify.
         - track_ids: List of track IDs to add.
         - position: Position to insert the tracks at (optional).
@@ -274,9 +778,12 @@ class Client:
 
         try:
             response = self.sp.playlist_add_items(playlist_id, track_ids, position=position)
+            self._playlist_changed(playlist_id)
             self.logger.info(f"Response from adding tracks: {track_ids} to playlist {playlist_id}: {response}")
+            return True
         except Exception as e:
             self.logger.error(f"Error adding tracks to playlist: {str(e)}")
+            return False
 
     @utils.ensure_username
     def remove_tracks_from_playlist(self, playlist_id: str, track_ids: List[str]):
@@ -292,6 +799,7 @@ class Client:
 
         try:
             response = self.sp.playlist_remove_all_occurrences_of_items(playlist_id, track_ids)
+            self._playlist_changed(playlist_id)
             self.logger.info(f"Response from removing tracks: {track_ids} from playlist {playlist_id}: {response}")
         except Exception as e:
             self.logger.error(f"Error removing tracks from playlist: {str(e)}")
@@ -318,6 +826,7 @@ class Client:
                 description=description
             )
             self.logger.info(f"Created playlist: {name} (ID: {playlist['id']})")
+            self.library_cache.invalidate('playlists')
             return utils.parse_playlist(playlist, self.username, detailed=True)
         except Exception as e:
             self.logger.error(f"Error creating playlist: {str(e)}")
@@ -337,6 +846,7 @@ class Client:
 
         try:
             response = self.sp.playlist_change_details(playlist_id, name=name, description=description)
+            self._playlist_changed(playlist_id)
             self.logger.info(f"Response from changing playlist details: {response}")
         except Exception as e:
             self.logger.error(f"Error changing playlist details: {str(e)}")
@@ -374,13 +884,167 @@ class Client:
     def auth_refresh(self):
         self.auth_manager.validate_token(self.cache_handler.get_cached_token())
 
-    def skip_track(self, n=1):
+    def skip_track(self, n=1, jump=True):
+        """
+        Skips n tracks ahead.
+        - n: number of tracks to skip.
+        - jump: for n > 1, start playback directly at the target track instead of calling next n times.
+          Only done for n >= JUMP_MIN_SKIPS, when the next n tracks are known to be the next n of the album or
+          playlist being played; otherwise (manually queued tracks, shuffle, Liked Songs and other contexts) it steps.
+        """
+        if n >= JUMP_MIN_SKIPS and jump and self._jump_ahead(n):
+            return
         # todo: Better error handling
         for _ in range(n):
             self.sp.next_track()
+        state = self._fresh_player_state()
+        if n == 1 and state and state['queue_known'] and state['queue_head']:
+            # The queue beyond the new track is unknown until the next refresh
+            self._player_changed(track=state['queue_head'], is_playing=True,
+                                 progress_ms=0, duration_ms=0, queue_head=None, queue_known=False)
+        else:
+            self._player_changed()
+
+    def _jump_ahead(self, n: int) -> bool:
+        """
+        Starts playback at the n-th upcoming track of the current album or playlist with a single command.
+        Returns False, without changing playback, if that target cannot be confirmed or the jump fails.
+        The context lookup gets the requests stepping would have taken beyond the jump's own, so a jump
+        never costs more than stepping.
+        """
+        try:
+            response = self.sp.queue()
+            queue = response.get('queue') or []
+            current = response.get('currently_playing')
+            if len(queue) < n or not current or not all(queue[:n]):
+                return False
+
+            state = self._fresh_player_state()
+            if state is not None:
+                context_uri = state['context_uri']
+                spent = 1
+            else:
+                playback = self.sp.current_playback() or {}
+                context_uri = (playback.get('context') or {}).get('uri')
+                spent = 2
+            # Leaves one request for the play command
+            position = self._context_position(context_uri, current, [t['id'] for t in queue[:n]],
+                                              max_pages=n - spent - 1)
+            if position is None:
+                self.jump_hint = None
+                return False
+
+            # Stay in the album/playlist so playback continues from the target afterwards
+            self.sp.start_playback(context_uri=context_uri, offset={'position': position})
+        except SpotifyException as e:
+            self.logger.error(f"Could not jump {n} tracks ahead, stepping instead: {str(e)}")
+            return False
+        target = queue[n - 1]
+        self.jump_hint = (context_uri, position)
+        self.logger.info(f"Jumped {n} tracks ahead to {target['name']}")
+
+        following = queue[n] if len(queue) > n else None
+        self._player_changed(track=utils.parse_track(target), is_playing=True, progress_ms=0,
+                             duration_ms=target.get('duration_ms') or 0,
+                             queue_head=utils.parse_track(following) if following else None,
+                             queue_known=True)
+        return True
+
+    def _context_position(self, context_uri: Optional[str], current: dict, upcoming_ids: List[str],
+                          max_pages: int) -> Optional[int]:
+        """
+        Position in the context of the last of upcoming_ids, if the context is an album or playlist in which
+        they directly follow the current track. The queue Spotify reports also holds manually queued tracks,
+        which are not part of the context and cannot be jumped to.
+        Reads at most max_pages pages, starting around the current track: at its track number on the first
+        disc of an album, or at the previous jump's target in the same context. Returns None if the tracks
+        were not found by then.
+        """
+        parts = (context_uri or '').split(':')
+        if len(parts) != 3 or parts[1] not in ('album', 'playlist'):
+            return None  # only albums and playlists accept an offset; Liked Songs is spotify:user:...:collection
+        if parts[1] == 'album' and current.get('disc_number') == 1 and current.get('track_number'):
+            start = current['track_number'] - 1
+        elif self.jump_hint is not None and self.jump_hint[0] == context_uri:
+            start = self.jump_hint[1]
+        else:
+            start = 0
+
+        n = len(upcoming_ids)
+        context_ids = []
+        for _ in range(max_pages):
+            if parts[1] == 'album':
+                page = self.sp.album_tracks(parts[2], limit=50, offset=start + len(context_ids))
+                context_ids.extend(t['id'] if t else None for t in page['items'])
+            else:
+                page = self.get_playlist_items_page(parts[2], offset=start + len(context_ids), projection='ids',
+                                                    narrow=lambda item: (item.get('track') or {}).get('id'))
+                context_ids.extend(page['items'])
+            for i, track_id in enumerate(context_ids):
+                if track_id == current['id'] and context_ids[i + 1:i + 1 + n] == upcoming_ids:
+                    return start + i + n
+            if not page.get('next') or not page['items']:
+                break
+        return None
 
     def previous_track(self):
         self.sp.previous_track()
+        self._player_changed()
+
+    def refresh_player_state(self) -> Dict:
+        """
+        Fetches playback state into the player snapshot: current track, progress, device and queue head.
+        The queue is only re-read when the track changes.
+        """
+        playback = self.sp.current_playback()
+        previous = self.player_state
+        state = {'track': None, 'is_playing': False, 'progress_ms': 0, 'duration_ms': 0,
+                 'device': None, 'context_uri': None, 'queue_head': None, 'queue_known': True}
+        if playback and playback.get('currently_playing_type') == 'track' and playback.get('item'):
+            item = playback['item']
+            device = playback.get('device') or {}
+            state.update(
+                track=utils.parse_track(item),
+                is_playing=bool(playback.get('is_playing')),
+                progress_ms=playback.get('progress_ms') or 0,
+                duration_ms=item.get('duration_ms') or 0,
+                device={'id': device.get('id'), 'name': device.get('name')} if device else None,
+                context_uri=(playback.get('context') or {}).get('uri'),
+            )
+            if previous and previous['queue_known'] and previous['track'] and previous['track']['id'] == item['id']:
+                state['queue_head'] = previous['queue_head']
+            else:
+                queue = self.sp.queue().get('queue') or []
+                state['queue_head'] = utils.parse_track(queue[0]) if queue else None
+
+        self.player_state = state
+        self.player_state_at = time.monotonic()
+        self.player_cache.set('now_playing', dict(state['track'], is_playing=state['is_playing'])
+                              if state['track'] else None)
+        return state
+
+    def _fresh_player_state(self) -> Optional[Dict]:
+        if not self.use_player_state or self.player_state is None:
+            return None
+        if time.monotonic() - self.player_state_at >= PLAYER_STATE_MAX_AGE:
+            return None
+        return self.player_state
+
+    def _player_changed(self, **expected):
+        """
+        Updates player data after a playback command.
+        - expected: the snapshot fields the command is known to have set. With OPTIMISTIC_PLAYER_STATE they are
+          applied to the snapshot right away; otherwise (or without them) the snapshot is dropped until the next read.
+        """
+        if expected and OPTIMISTIC_PLAYER_STATE and self.player_state and \
+                (self.player_state['track'] or expected.get('track')):
+            state = dict(self.player_state, **expected)
+            self.player_state = state
+            self.player_state_at = time.monotonic()
+            self.player_cache.set('now_playing', dict(state['track'], is_playing=state['is_playing']))
+            return
+        self.player_state_at = 0.0
+        self.player_cache.invalidate('now_playing')
 
     def seek_to_position(self, position_ms):
         self.sp.seek_track(position_ms=position_ms)
@@ -396,13 +1060,19 @@ class Client:
             track_id = track_id.split(':')[2]
         return self.sp.track(track_id)
 
-    def get_artist_albums(self, artist_id: str, include_singles: bool = True, limit: int = 50) -> List[Dict]:
-        """Get all albums for an artist with pagination."""
-        album_type = 'album,single' if include_singles else 'album'
+    def get_artist_albums(self, artist_id: str, include_singles: bool = True, limit: int = 50,
+                          narrow: Optional[Callable[[dict], object]] = None) -> List:
+        """
+        Get all albums for an artist with pagination.
+        - narrow: applied to each album as it is decoded; the results are returned instead of full albums.
+        """
+        include_groups = 'album,single' if include_singles else 'album'
+        artist_id = self.sp._get_id('artist', artist_id)
         all_albums = []
         offset = 0
         while True:
-            results = self.sp.artist_albums(artist_id, album_type=album_type, limit=limit, offset=offset)
+            results = self.sp.get_page(f"artists/{artist_id}/albums", narrow, include_groups=include_groups,
+                                       limit=limit, offset=offset)
             all_albums.extend(results['items'])
             if not results['next']:
                 break
@@ -431,6 +1101,32 @@ class Client:
             offset += limit
         return playlists
 
+    def get_saved_tracks_page(self, offset: int = 0, limit: int = 50,
+                              narrow: Optional[Callable[[dict], object]] = None) -> Dict:
+        """
+        Get one page of the user's saved tracks ({'items', 'next', ...}).
+        - narrow: applied to each item as it is decoded; 'items' then holds the results, one per item.
+        """
+        return self.sp.get_page("me/tracks", narrow, limit=limit, offset=offset)
+
+    def get_playlists_page(self, offset: int = 0, limit: int = 50) -> Dict:
+        """Get one page of the user's playlists ({'items', 'next', ...})."""
+        return self.sp.current_user_playlists(limit=limit, offset=offset)
+
+    def get_playlist_items_page(self, playlist_id: str, offset: int = 0, limit: int = 100,
+                                projection: Optional[str] = None,
+                                narrow: Optional[Callable[[dict], object]] = None) -> Dict:
+        """
+        Get one page of a playlist's items ({'items', 'next', ...}).
+        - projection: a PLAYLIST_ITEM_FIELDS preset ('ids', 'artists' or 'display') to fetch only those
+                      fields, or None for full items.
+        - narrow: applied to each item as it is decoded; 'items' then holds the results, one per item.
+        """
+        fields = PLAYLIST_ITEM_FIELDS[projection] if projection else None
+        playlist_id = self.sp._get_id('playlist', playlist_id)
+        return self.sp.get_page(f"playlists/{playlist_id}/tracks", narrow, fields=fields, limit=limit,
+                                offset=offset, additional_types="track,episode")
+
     def get_artists_for_tracks(self, track_ids: List[str]) -> List[str]:
         """Get unique artist IDs for multiple tracks (batch request)."""
         artist_ids = set()
@@ -454,14 +1150,16 @@ class Client:
         return genres
 
     def get_top_tracks(self, time_range: str = 'short_term', limit: int = 50) -> List[Dict]:
-        """Get user's top tracks for time period."""
-        results = self.sp.current_user_top_tracks(time_range=time_range, limit=limit)
-        return results['items']
+        """Get user's top tracks for time period, sliced from the cached snapshot."""
+        items = self.top_items_cache.get(('tracks', time_range), lambda: self.sp.current_user_top_tracks(
+            time_range=time_range, limit=TOP_ITEMS_MAX_LIMIT)['items'])
+        return items[:limit]
 
     def get_top_artists(self, time_range: str = 'short_term', limit: int = 50) -> List[Dict]:
-        """Get user's top artists for time period."""
-        results = self.sp.current_user_top_artists(time_range=time_range, limit=limit)
-        return results['items']
+        """Get user's top artists for time period, sliced from the cached snapshot."""
+        items = self.top_items_cache.get(('artists', time_range), lambda: self.sp.current_user_top_artists(
+            time_range=time_range, limit=TOP_ITEMS_MAX_LIMIT)['items'])
+        return items[:limit]
 
     def get_recently_played(self, limit: int = 50) -> List[Dict]:
         """Get recently played tracks."""
@@ -471,7 +1169,7 @@ class Client:
     def search_by_genre(self, genre: str, year_range: str = "2015-2025", limit: int = 20) -> List[Dict]:
         """Search for tracks by genre with optional year filter."""
         query = f'genre:"{genre}" year:{year_range}'
-        results = self.sp.search(q=query, type='track', limit=limit)
+        results = self._search(query, qtype='track', limit=limit)
         return results.get('tracks', {}).get('items', [])
 
     def get_artist(self, artist_id: str) -> Dict:
@@ -485,13 +1183,12 @@ class Client:
         track_ids = set()
         offset = 0
         while len(track_ids) < limit:
-            results = self.sp.current_user_saved_tracks(limit=50, offset=offset)
+            results = self.get_saved_tracks_page(offset=offset, limit=50,
+                                                 narrow=lambda item: (item.get('track') or {}).get('id'))
             items = results.get('items', [])
             if not items:
                 break
-            for item in items:
-                if item and item.get('track'):
-                    track_ids.add(item['track']['id'])
+            track_ids.update(track_id for track_id in items if track_id)
             offset += 50
         return track_ids
 
@@ -532,3 +1229,53 @@ class Client:
             batch = track_ids[i:i+50]
             results.extend(self.sp.current_user_saved_tracks_contains(tracks=batch))
         return results
+
+
+def _pairs(ids: List[str]) -> List[Tuple[str, str]]:
+    return list(zip(ids, ids[1:]))
+
+
+def _drop_fields(value):
+    """Removes DROPPED_FIELDS from a decoded response, in place."""
+    if isinstance(value, dict):
+        for field in DROPPED_FIELDS.intersection(value):
+            del value[field]
+        for item in value.values():
+            if isinstance(item, (dict, list)):
+                _drop_fields(item)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, (dict, list)):
+                _drop_fields(item)
+    return value
+
+
+def _drop_fields_hook(obj: dict) -> dict:
+    """json object_hook removing DROPPED_FIELDS while a response is decoded."""
+    for field in DROPPED_FIELDS.intersection(obj):
+        del obj[field]
+    return obj
+
+
+def _retry_after(error: SpotifyException) -> Optional[float]:
+    """Seconds a 429 answer asks to wait, or None for other errors."""
+    if error.http_status != 429:
+        return None
+    retry_after = (getattr(error, 'headers', None) or {}).get('Retry-After')
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except ValueError:
+        return None
+
+
+def _spotify_error(response: requests.Response) -> SpotifyException:
+    """The SpotifyException spotipy raises for an error response."""
+    try:
+        error = response.json().get("error", {})
+        msg = error.get("message")
+        reason = error.get("reason")
+    except ValueError:
+        msg = response.text or None
+        reason = None
+    return SpotifyException(response.status_code, -1, f"{response.url}:\n {msg}", reason=reason,
+                            headers=response.headers)
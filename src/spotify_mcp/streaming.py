@@ -0,0 +1,120 @@
+"""
+Incremental decoding of Spotify paging objects.
+
+The large list endpoints (playlist items, saved tracks, artist albums) answer
+with a paging object whose "items" array holds full track or album objects.
+Decoding such a page at once builds every item before the caller narrows them
+to the few fields it reads. Here the body is decoded while it is read: each
+item is decoded on its own and handed to a narrowing function, and only what
+that returns is kept, so at most one full item is alive at a time.
+
+Decoding uses the standard library decoder one value at a time
+(JSONDecoder.raw_decode), over a text buffer that holds roughly one item plus
+one chunk of the body. With the HTTP cache on, the raw bytes of the body are
+collected as they are read and stored once the page is done (see
+http_cache.py); the decoded items are never kept whole.
+"""
+
+import codecs
+import json
+from typing import Any, Callable, Iterable, List, Optional
+
+# Bytes read from the response at a time
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """JSON values and punctuation read from an iterable of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes], decoder: json.JSONDecoder):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = decoder
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def peek(self) -> str:
+        """The next non-whitespace character, or '' at the end of the body."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in paging object, found {found or 'end of body'!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decodes the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A value ending with the buffer (e.g. a number) may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _fill(self) -> bool:
+        """Appends the next chunk to the buffer; False once the body is exhausted."""
+        if self._exhausted:
+            return False
+        chunk = next(self._chunks, None)
+        self._exhausted = chunk is None
+        text = self._text.decode(chunk or b"", final=self._exhausted)
+        # Consumed text is dropped, so the buffer does not grow with the page
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+
+def decode_page(chunks: Iterable[bytes], narrow: Optional[Callable[[dict], Any]] = None,
+                object_hook: Optional[Callable[[dict], Any]] = None) -> dict:
+    """
+    Decodes a paging object ({'items', 'next', 'total', ...}) from the chunks of its body.
+    - narrow: called with each item as soon as it is decoded; 'items' holds what it returns, one entry
+              per item (null items stay None). Items are kept whole when not given.
+    - object_hook: applied to every decoded object, as in json.loads.
+    """
+    reader = _Reader(chunks, json.JSONDecoder(object_hook=object_hook))
+    page = {}
+    reader.expect("{")
+    while reader.peek() != "}":
+        if page:
+            reader.expect(",")
+        key = reader.value()
+        reader.expect(":")
+        if key == "items" and reader.peek() == "[":
+            page[key] = _decode_items(reader, narrow)
+        else:
+            page[key] = reader.value()
+    reader.expect("}")
+    # Reads the body to its end, which also lets the HTTP cache store it
+    if reader.peek():
+        raise ValueError("Unexpected data after paging object")
+    return page
+
+
+def _decode_items(reader: _Reader, narrow: Optional[Callable[[dict], Any]]) -> List[Any]:
+    items = []
+    reader.expect("[")
+    while reader.peek() != "]":
+        if items:
+            reader.expect(",")
+        item = reader.value()
+        items.append(narrow(item) if narrow is not None and item is not None else item)
+    reader.expect("]")
+    return items
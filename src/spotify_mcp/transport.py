@@ -0,0 +1,85 @@
+"""
+Shared HTTP transport for everything the server sends: Spotify Web API
+requests, token refreshes and the token backend.
+
+All of them use one requests.Session, so connections are kept alive and
+reused across requests instead of paying a TCP and TLS handshake each time.
+Each host gets a pool sized to the number of requests that can be in flight
+at once. Web API requests keep spotipy's retry policy for server errors
+(POST requests excepted, see API_RETRY), and go through the validating response cache in
+http_cache.py; other hosts get no automatic retries, since their callers
+handle failures themselves (see remote_cache_handler.py).
+"""
+
+import os
+from typing import Dict, Tuple
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from . import http_cache
+
+CONNECT_TIMEOUT = float(os.getenv("SPOTIFY_HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("SPOTIFY_HTTP_READ_TIMEOUT", "5"))
+
+API_PREFIX = "https://api.spotify.com/"
+# spotipy's policy for its own session, with two changes:
+# - 429 answers are left to the request scheduler, which waits out Retry-After without holding a
+#   request slot (see spotify_api.Spotify._send).
+# - POST requests are not resent once they reached Spotify: they are not idempotent (queue inserts,
+#   playlist additions and creation), and their callers check whether a failed request was applied
+#   before retrying (see Client.add_many_to_queue). Connection errors, where nothing was sent, are
+#   still retried.
+API_RETRY = urllib3.Retry(
+    total=3,
+    connect=None,
+    read=False,
+    allowed_methods=frozenset(['GET', 'PUT', 'DELETE']),
+    status=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
+    # Otherwise urllib3 retries any 429 carrying Retry-After, whatever status_forcelist says
+    respect_retry_after_header=False)
+
+
+class Transport:
+    def __init__(self, pool_size: int):
+        """
+        - pool_size: connections kept alive per host; match it to the requests that can run at once.
+        """
+        self.timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.session = requests.Session()
+        self.cache = http_cache.HTTPCache() if http_cache.HTTP_CACHE else None
+        if self.cache is not None:
+            api_adapter = http_cache.CachingAdapter(self.cache, pool_connections=4, pool_maxsize=pool_size,
+                                                    max_retries=API_RETRY)
+        else:
+            api_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=API_RETRY)
+        self._adapters = [api_adapter, HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)]
+        self.session.mount(API_PREFIX, self._adapters[0])
+        self.session.mount("https://", self._adapters[1])
+        self.session.mount("http://", self._adapters[1])
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Requests sent and connections opened so far, the share of requests that reused a connection,
+        and the response cache's counters.
+        """
+        requests_sent = connections = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:  # evicted meanwhile
+                    requests_sent += pool.num_requests
+                    connections += pool.num_connections
+        return {
+            'requests': requests_sent,
+            'connections': connections,
+            'reuse_ratio': round(1 - connections / requests_sent, 3) if requests_sent else 0.0,
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+
+    def close(self):
+        self.session.close()
@@ -1,9 +1,10 @@
 from collections import defaultdict
 from typing import Optional, Dict
 import functools
+import unicodedata
 from typing import Callable, TypeVar
 from typing import Optional, Dict
-from urllib.parse import quote, urlparse, urlunparse
+from urllib.parse import quote, unquote, urlparse, urlunparse
 
 from requests import RequestException
 
@@ -37,7 +38,9 @@ def parse_track(track_item: dict, detailed=False) -> Optional[dict]:
         narrowed_item['is_playing'] = track_item['is_playing']
 
     if detailed:
-        narrowed_item['album'] = parse_album(track_item.get('album'))
+        album = track_item.get('album')
+        # Projected responses (e.g. PLAYLIST_ITEM_FIELDS['display']) carry only part of the album
+        narrowed_item['album'] = parse_album(album) if album and 'artists' in album else None
         for k in ['track_number', 'duration_ms']:
             narrowed_item[k] = track_item.get(k)
 
@@ -213,6 +216,30 @@ def build_search_query(base_query: str,
     return quote(" ".join(query_parts))
 
 
+def normalize_search_query(query: str) -> str:
+    """
+    Normalize a search query so equivalent queries are sent (and cached) identically.
+    Accepts both plain queries and the encoded strings returned by build_search_query.
+    """
+    return " ".join(unquote(query).split())
+
+
+def search_cache_key(query: str, qtype: str, limit: int, offset: int = 0) -> tuple:
+    """Cache key for a search: case-insensitive query, order-insensitive types, limit and offset."""
+    types = ",".join(sorted(t.strip() for t in qtype.split(",")))
+    return normalize_search_query(query).lower(), types, limit, offset
+
+
+def fold_name(name: str) -> str:
+    """
+    Fold a name for lookups: case, diacritics and spacing are ignored,
+    so 'Beyoncé', 'beyonce' and ' BEYONCE ' all fold to the same key.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
 def validate(func: Callable[..., T]) -> Callable[..., T]:
     """
     Decorator for Spotify API methods that handles authentication and device validation.
@@ -235,6 +262,21 @@ def validate(func: Callable[..., T]) -> Callable[..., T]:
 
     return wrapper
 
+def ensure_auth(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Decorator for Spotify API methods that need a valid token but no playback device.
+    Same authentication handling as validate, without the device lookup.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not self.auth_ok():
+            self.auth_refresh()
+        return func(self, *args, **kwargs)
+
+    return wrapper
+
+
 def ensure_username(func):
     """
     Decorator to ensure that the username is set before calling the function.